@@ -0,0 +1,317 @@
+"""
+Benchmark the bot plugin against a fake server at different fleet sizes.
+
+Run in src/bot:
+    python -m benchmark --bots 10 100 1000
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# more_command_nodes is a sibling plugin
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..',
+    'more_command_nodes'
+))
+
+from benchmark.fake_server import (  # noqa: E402
+    FakeServer, install, run_command, wait_until
+)
+
+TAG = 'benchmark'
+
+
+class ThreadSampler:
+    """
+    Sample the number of alive threads, excluding the sampler itself.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.__interval = interval
+        self.__stopped = threading.Event()
+        self.peak = threading.active_count()
+        self.__thread = threading.Thread(
+            target=self.__loop,
+            name='Benchmark-ThreadSampler',
+            daemon=True
+        )
+        self.__thread.start()
+
+    def stop(self) -> int:
+        self.__stopped.set()
+        self.__thread.join()
+        return self.peak
+
+    def __loop(self) -> None:
+        while not self.__stopped.wait(self.__interval):
+            self.peak = max(self.peak, threading.active_count() - 1)
+
+
+def measure(func: Callable[[int], Any], repeat: int) -> Dict[str, float]:
+    """
+    Call func(i) repeat times, HTTP responses must be 2xx.
+    :return: Mean, p95 and max latency in milliseconds.
+    """
+    latencies = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = func(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+        status_code = getattr(result, 'status_code', None)
+        assert status_code is None or 200 <= status_code < 300, (
+            f'Unexpected status {status_code}'
+        )
+    latencies.sort()
+    return {
+        'mean': sum(latencies) / len(latencies),
+        'p95': latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)],
+        'max': latencies[-1]
+    }
+
+
+def write_bot_list(server: FakeServer, count: int) -> None:
+    bot_list = [
+        {
+            'name': f'bot_{i}',
+            'location': {
+                'position': [i * 1.0, 64.0, 0.0],
+                'facing': [0.0, 0.0],
+                'dimension': 0
+            },
+            'comment': f'Benchmark bot {i}',
+            'actions': [],
+            'tags': [TAG],
+            'autoLogin': False,
+            'autoRunActions': False,
+            'autoUpdate': False
+        }
+        for i in range(count)
+    ]
+    path = os.path.join(server.data_folder, 'botList.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'botList': bot_list}, f, indent=4)
+
+
+def write_config(server: FakeServer, args: argparse.Namespace) -> None:
+    path = os.path.join(server.data_folder, 'config.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'spawn_batch_size': args.batch_size,
+            'spawn_batch_interval': args.batch_interval
+        }, f)
+
+
+def load_plugin(server: FakeServer):
+    # fresh modules, listeners are registered on import
+    for name in list(sys.modules):
+        if name == 'bot' or name.startswith('bot.'):
+            del sys.modules[name]
+    module = importlib.import_module('bot')
+    module.on_load(server, None)
+    return module.plugin
+
+
+def make_api_client(server: FakeServer):
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError:
+        return None
+    app = server.fastapi_mcdr.apps.get('bot')
+    return None if app is None else TestClient(app)
+
+
+def run(count: int, args: argparse.Namespace) -> Dict[str, Any]:
+    server, api = install(args.query_latency, args.join_delay)
+    write_config(server, args)
+    write_bot_list(server, count)
+    result: Dict[str, Any] = {'bots': count}
+    sampler = ThreadSampler()
+
+    # load
+    start = time.perf_counter()
+    plugin = load_plugin(server)
+    wait_until(lambda: len(plugin.bot_manager.bots) >= count)
+    result['load'] = (time.perf_counter() - start) * 1000
+    result['idleThreads'] = threading.active_count() - 1
+    storage = plugin.bot_manager.storage
+    writes = storage.write_count, storage.write_bytes
+
+    # commands
+    result['list'] = measure(
+        lambda i: run_command(server, '!!bot list'), args.repeat
+    )
+    result['listTag'] = measure(
+        lambda i: run_command(server, f'!!bot list --tag {TAG}'),
+        args.repeat
+    )
+    result['info'] = measure(
+        lambda i: run_command(server, f'!!bot info bot_{i % count}'),
+        args.repeat
+    )
+
+    def save(i: int) -> None:
+        run_command(server, f'!!bot save new_{i} 1 2 3 0 0 0')
+        wait_until(lambda: plugin.bot_manager.is_in_list(f'bot_new_{i}'))
+
+    result['save'] = measure(save, args.repeat)
+    result['del'] = measure(
+        lambda i: run_command(server, f'!!bot del new_{i}'), args.repeat
+    )
+
+    # FastAPI
+    client = make_api_client(server)
+    if client is not None:
+        result['apiList'] = measure(
+            lambda i: client.get('/bots'), args.repeat
+        )
+        result['apiListPage'] = measure(
+            lambda i: client.get('/bots', params={'limit': 50}),
+            args.repeat
+        )
+        result['apiListCursor'] = measure(
+            lambda i: client.get('/bots', params={
+                'limit': 50,
+                'cursor': f'bot_{i % count}'
+            }),
+            args.repeat
+        )
+
+    # tag spawn and kill
+    start = time.perf_counter()
+    run_command(server, f'!!bot tags {TAG} spawn')
+    result['tagSpawnCommand'] = (time.perf_counter() - start) * 1000
+    waited = wait_until(
+        lambda: len(plugin.bot_manager.online_bots) >= count,
+        args.timeout
+    )
+    result['tagSpawnAllOnline'] = (
+        None if waited is None else (time.perf_counter() - start) * 1000
+    )
+    start = time.perf_counter()
+    run_command(server, f'!!bot tags {TAG} kill')
+    waited = wait_until(
+        lambda: len(plugin.bot_manager.online_bots) == 0,
+        args.timeout
+    )
+    result['tagKillAllOffline'] = (
+        None if waited is None else (time.perf_counter() - start) * 1000
+    )
+
+    # writes are counted after the last delayed flush
+    plugin.bot_manager.flush_data()
+    result['writeCount'] = storage.write_count - writes[0]
+    result['writeBytes'] = storage.write_bytes - writes[1]
+    result['peakThreads'] = sampler.stop()
+    result['queries'] = api.queries
+    result['commands'] = server.executed
+
+    server.dispatch('mcdr.plugin_unloaded')
+    server.stop()
+    return result
+
+
+def format_latency(value: Optional[Dict[str, float]]) -> str:
+    if value is None:
+        return '-'
+    return '{mean:.2f} / {p95:.2f} / {max:.2f}'.format(**value)
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    rows = [
+        ('load ms', lambda r: f'{r["load"]:.1f}'),
+        ('list ms', lambda r: format_latency(r['list'])),
+        ('list --tag ms', lambda r: format_latency(r['listTag'])),
+        ('info ms', lambda r: format_latency(r['info'])),
+        ('save ms', lambda r: format_latency(r['save'])),
+        ('del ms', lambda r: format_latency(r['del'])),
+        ('GET /bots ms', lambda r: format_latency(r.get('apiList'))),
+        ('GET /bots?limit ms', lambda r: format_latency(
+            r.get('apiListPage')
+        )),
+        ('GET /bots?cursor ms', lambda r: format_latency(
+            r.get('apiListCursor')
+        )),
+        ('tag spawn cmd ms', lambda r: f'{r["tagSpawnCommand"]:.2f}'),
+        ('tag spawn all ms', lambda r: (
+            'timeout' if r['tagSpawnAllOnline'] is None
+            else f'{r["tagSpawnAllOnline"]:.1f}'
+        )),
+        ('tag kill all ms', lambda r: (
+            'timeout' if r['tagKillAllOffline'] is None
+            else f'{r["tagKillAllOffline"]:.1f}'
+        )),
+        ('file writes', lambda r: str(r['writeCount'])),
+        ('file write KiB', lambda r: f'{r["writeBytes"] / 1024:.1f}'),
+        ('threads idle/peak', lambda r: (
+            f'{r["idleThreads"]} / {r["peakThreads"]}'
+        )),
+        ('data api queries', lambda r: str(r['queries'])),
+        ('server commands', lambda r: str(r['commands'])),
+    ]
+    table = [['bots', *(str(r['bots']) for r in results)]]
+    for title, cell in rows:
+        table.append([title, *(cell(r) for r in results)])
+    widths = [max(len(row[i]) for row in table) for i in range(len(table[0]))]
+    print('Latency columns are mean / p95 / max')
+    for row in table:
+        print('  '.join(
+            cell.ljust(widths[i]) if i == 0 else cell.rjust(widths[i])
+            for i, cell in enumerate(row)
+        ))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmark',
+        description='Benchmark the bot plugin against a fake server.'
+    )
+    parser.add_argument(
+        '--bots', type=int, nargs='+', default=[10, 100, 1000],
+        help='fleet sizes to benchmark'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=20,
+        help='runs of every latency measurement'
+    )
+    parser.add_argument(
+        '--query-latency', type=float, default=0.005,
+        help='seconds of every data API query'
+    )
+    parser.add_argument(
+        '--join-delay', type=float, default=0.01,
+        help='seconds between spawn command and join event'
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=100,
+        help='spawn_batch_size config'
+    )
+    parser.add_argument(
+        '--batch-interval', type=float, default=0.05,
+        help='spawn_batch_interval config'
+    )
+    parser.add_argument(
+        '--timeout', type=float, default=120.0,
+        help='seconds to wait for a tag spawn or kill'
+    )
+    parser.add_argument(
+        '--json', action='store_true',
+        help='print results as JSON'
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = [run(count, args) for count in args.bots]
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        print_report(results)
+
+
+if __name__ == '__main__':
+    main()
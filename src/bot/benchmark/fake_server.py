@@ -0,0 +1,301 @@
+"""
+In-process stand-ins of MCDReforged and minecraft_data_api, so the plugin can
+be driven without a Minecraft server.
+"""
+import os
+import sys
+import json
+import time
+import types
+import logging
+import tempfile
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from mcdreforged.api.rtext import RText
+from mcdreforged.api.types import CommandSource
+from mcdreforged.api.utils import serialize
+from mcdreforged.command.builder.callback import DirectCallbackInvoker
+from mcdreforged.plugin.si.server_interface import ServerInterface
+
+DEFAULT_PLAYER_INFO = {
+    'Pos': [0.5, 64.0, 0.5],
+    'Rotation': [0.0, 0.0],
+    'Dimension': 'minecraft:overworld'
+}
+
+
+class FakeDataApi(types.ModuleType):
+    """
+    Replacement of the minecraft_data_api module.
+    Every query sleeps query_latency seconds, like a console round trip.
+    """
+
+    def __init__(self, query_latency: float = 0.0):
+        super().__init__('minecraft_data_api')
+        self.query_latency = query_latency
+        self.players: Dict[str, Dict[str, Any]] = {}
+        self.queries = 0
+
+    def get_player_info(self, player: str, path: str = '', timeout=None):
+        self.queries += 1
+        if self.query_latency > 0:
+            time.sleep(self.query_latency)
+        info = self.players.get(player, DEFAULT_PLAYER_INFO)
+        return info.get(path) if path else info
+
+    def get_server_player_list(self, timeout=None):
+        self.queries += 1
+        if self.query_latency > 0:
+            time.sleep(self.query_latency)
+        return len(self.players), 20, list(self.players)
+
+    @staticmethod
+    def get_dimension_translation_text(dim_id: int) -> RText:
+        return RText(str(dim_id))
+
+
+class FakeFastAPIMCDR:
+    COLLECT_EVENT = 'fastapi_mcdr.collect'
+
+    def __init__(self):
+        self.apps: Dict[str, Any] = {}
+
+    @staticmethod
+    def is_ready() -> bool:
+        return True
+
+    def mount(self, plugin_id: str, app) -> None:
+        self.apps[plugin_id] = app
+
+    def unmount(self, plugin_id: str) -> None:
+        self.apps.pop(plugin_id, None)
+
+
+class FakeInfo:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _Metadata:
+    id = 'bot'
+
+
+class FakeServer:
+    """
+    Duck typed PluginServerInterface.
+    Carpet "player" commands are answered like a server does: spawned bots
+    join and killed bots leave after join_delay seconds, dispatched from a
+    single thread.
+    """
+
+    def __init__(self, api: FakeDataApi, join_delay: float = 0.0):
+        self.__api = api
+        self.__join_delay = join_delay
+        self.__data_folder = tempfile.mkdtemp(prefix='bot-benchmark-')
+        self.__condition = threading.Condition()
+        self.__events: Deque[Tuple[float, str, tuple]] = deque()
+        self.__stopped = False
+
+        self.logger = logging.getLogger('bot')
+        self.fastapi_mcdr = FakeFastAPIMCDR()
+        self.commands: List[Any] = []
+        self.listeners: Dict[str, List[Callable]] = {}
+        self.executed = 0
+
+        self.__thread = threading.Thread(
+            target=self.__loop,
+            name='Fake-Server',
+            daemon=True
+        )
+        self.__thread.start()
+
+    @property
+    def data_folder(self) -> str:
+        return self.__data_folder
+
+    def stop(self) -> None:
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+        self.__thread.join()
+
+    # PluginServerInterface
+
+    def get_data_folder(self) -> str:
+        return self.__data_folder
+
+    @staticmethod
+    def get_self_metadata():
+        return _Metadata()
+
+    def get_plugin_instance(self, plugin_id: str):
+        return self.fastapi_mcdr if plugin_id == 'fastapi_mcdr' else None
+
+    def load_config_simple(
+            self,
+            file_name: str = 'config.json',
+            default_config=None,
+            *,
+            target_class=None,
+            **kwargs
+    ):
+        path = os.path.join(self.__data_folder, file_name)
+        data = None
+        if os.path.isfile(path):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        if target_class is not None:
+            if data is None:
+                return target_class.get_default()
+            return target_class.deserialize(data)
+        return default_config if data is None else data
+
+    def save_config_simple(
+            self,
+            config,
+            file_name: str = 'config.json',
+            **kwargs
+    ) -> None:
+        path = os.path.join(self.__data_folder, file_name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(serialize(config), f, indent=4)
+
+    def register_command(self, node) -> None:
+        self.commands.append(node)
+
+    def register_help_message(self, *args, **kwargs) -> None:
+        pass
+
+    def register_event_listener(self, event, callback, priority=None):
+        event_id = str(getattr(event, 'id', event))
+        self.listeners.setdefault(event_id, []).append(callback)
+
+    def execute(self, command: str) -> None:
+        self.executed += 1
+        words = command.split()
+        if len(words) >= 3 and words[0] == 'player':
+            player = words[1]
+            if words[2] == 'spawn':
+                self.__post('mcdr.player_joined', player, FakeInfo(
+                    f'{player}[local] logged in with entity id 1 at '
+                    f'(0.5, 64.0, 0.5)'
+                ))
+                self.__api.players[player] = DEFAULT_PLAYER_INFO
+            elif words[2] == 'kill':
+                self.__post('mcdr.player_left', player)
+                self.__api.players.pop(player, None)
+
+    @staticmethod
+    def rtr(key: str, *args, **kwargs) -> str:
+        return key
+
+    def say(self, *args, **kwargs) -> None:
+        pass
+
+    def tell(self, *args, **kwargs) -> None:
+        pass
+
+    # events
+
+    def dispatch(self, event_id: str, *args) -> None:
+        """
+        Call listeners of an event on the current thread.
+        """
+        for callback in self.listeners.get(event_id, []):
+            callback(self, *args)
+
+    def __post(self, event_id: str, *args) -> None:
+        with self.__condition:
+            self.__events.append(
+                (time.monotonic() + self.__join_delay, event_id, args)
+            )
+            self.__condition.notify_all()
+
+    def __loop(self) -> None:
+        while True:
+            with self.__condition:
+                while True:
+                    if self.__stopped:
+                        return
+                    if len(self.__events) > 0:
+                        timeout = self.__events[0][0] - time.monotonic()
+                        if timeout <= 0:
+                            _, event_id, args = self.__events.popleft()
+                            break
+                        self.__condition.wait(timeout)
+                    else:
+                        self.__condition.wait()
+            try:
+                self.dispatch(event_id, *args)
+            except Exception:
+                self.logger.exception(f'Error occurred in event {event_id}')
+
+
+class FakeSource(CommandSource):
+    def __init__(self, server: FakeServer):
+        self.__server = server
+        self.replies: List[Any] = []
+
+    @property
+    def is_player(self) -> bool:
+        return False
+
+    @property
+    def is_console(self) -> bool:
+        return True
+
+    def get_server(self):
+        return self.__server
+
+    def get_permission_level(self) -> int:
+        return 4
+
+    def reply(self, message, **kwargs) -> None:
+        self.replies.append(message)
+
+
+def install(
+        query_latency: float = 0.0,
+        join_delay: float = 0.0
+) -> Tuple[FakeServer, FakeDataApi]:
+    """
+    Install the fakes, the bot package must be imported after this.
+    :param query_latency: Seconds of every data API query.
+    :param join_delay: Seconds between spawn command and join event.
+    :return: A tuple of the server and the data API.
+    """
+    api = FakeDataApi(query_latency)
+    server = FakeServer(api, join_delay)
+    sys.modules['minecraft_data_api'] = api
+    ServerInterface.psi = classmethod(lambda cls: server)
+    return server, api
+
+
+def run_command(server: FakeServer, command: str) -> List[Any]:
+    """
+    Run a command as console.
+    :return: Replies.
+    """
+    source = FakeSource(server)
+    for node in server.commands:
+        for result in node._entry_execute(source, command):
+            result.scheduled_callback.invoke(DirectCallbackInvoker())
+    return source.replies
+
+
+def wait_until(
+        predicate: Callable[[], bool],
+        timeout: float = 60.0
+) -> Optional[float]:
+    """
+    Wait until predicate returns True.
+    :return: Seconds waited, or None if timed out.
+    """
+    start = time.perf_counter()
+    while not predicate():
+        if time.perf_counter() - start > timeout:
+            return None
+        time.sleep(0.001)
+    return time.perf_counter() - start
@@ -0,0 +1,254 @@
+import time
+import heapq
+import itertools
+import threading
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    from bot.bot import Bot
+    from bot.plugin import Plugin
+
+# seconds of a game tick
+TICK = 0.05
+
+
+class Action(NamedTuple):
+    """
+    A parsed action, such as "delay 20 every 100 times 5 jump".
+    Times 0 means repeat forever, only with an interval.
+    """
+    command: str
+    delay: int = 0
+    interval: int = 0
+    times: int = 1
+
+    @staticmethod
+    def parse(action: str) -> 'Action':
+        """
+        Parse an action string with optional leading scheduling options:
+        "delay <ticks>", "every <ticks>" and "times <count>".
+        Repeats forever if "every" is given without "times" or with
+        "times 0", "times 0" alone runs once.
+        :param action: Action string.
+        :return: Action.
+        """
+        options: Dict[str, int] = {}
+        words = action.split()
+        while (
+                len(words) >= 3 and
+                words[0] in ('delay', 'every', 'times') and
+                words[0] not in options and
+                words[1].isdigit()
+        ):
+            options[words[0]] = int(words[1])
+            words = words[2:]
+
+        interval = options.get('every', 0)
+        times = options.get('times', 0 if interval > 0 else 1)
+        if times == 0 and interval == 0:
+            # would send the command every tick until killed
+            times = 1
+        return Action(
+            ' '.join(words),
+            options.get('delay', 0),
+            interval,
+            times
+        )
+
+
+class Job:
+    def __init__(self, bot: 'Bot', action: Action):
+        self.bot = bot
+        self.action = action
+        # None means repeat forever
+        self.remaining: Optional[int] = action.times or None
+        self.cancelled = False
+
+
+class ActionScheduler:
+    """
+    Run actions of all bots from one timer thread.
+    Actions run in order, and at most action_commands_per_tick commands
+    are sent in a game tick, the rest are sent in following ticks.
+    """
+
+    def __init__(self, plugin: 'Plugin'):
+        self.__plugin: 'Plugin' = plugin
+        self.__condition = threading.Condition()
+        self.__heap: List[Tuple[int, int, Job]] = []
+        self.__jobs: Dict['Bot', List[Job]] = {}
+        self.__sequence = itertools.count()
+        self.__start = time.monotonic()
+        self.__stopped = False
+        self.__command_count = 0
+
+        self.__thread = threading.Thread(
+            target=self.__loop,
+            name='Bot-ActionScheduler',
+            daemon=True
+        )
+        self.__thread.start()
+
+    @property
+    def queue_size(self) -> int:
+        return len(self.__heap)
+
+    @property
+    def command_count(self) -> int:
+        return self.__command_count
+
+    def schedule(self, bot: 'Bot', actions: List[str]) -> None:
+        """
+        Schedule actions of a bot.
+        Repeating actions already scheduled for the bot are not added again.
+        :param bot: Bot.
+        :param actions: Action strings.
+        """
+        with self.__condition:
+            now = self.__current_tick()
+            for action in map(Action.parse, actions):
+                if action.interval > 0 and any(
+                        job.action == action
+                        for job in self.__jobs.get(bot, [])
+                ):
+                    continue
+                job = Job(bot, action)
+                self.__jobs.setdefault(bot, []).append(job)
+                self.__push(now + action.delay, job)
+            self.__condition.notify_all()
+
+    def export_jobs(self) -> List[Tuple[str, Tuple, Optional[int], int]]:
+        """
+        Export scheduled jobs as plain data, used to hand over on reload.
+        :return: A list of (bot name, action, remaining, ticks until due).
+        """
+        with self.__condition:
+            now = self.__current_tick()
+            return [
+                (job.bot.name, tuple(job.action), job.remaining, tick - now)
+                for tick, _, job in sorted(self.__heap)
+                if not job.cancelled
+            ]
+
+    def restore_job(
+            self,
+            bot: 'Bot',
+            action: Tuple,
+            remaining: Optional[int],
+            delay: int
+    ) -> None:
+        """
+        Schedule a job exported by export_jobs.
+        :param bot: Bot.
+        :param action: Action fields.
+        :param remaining: Remaining times, None means forever.
+        :param delay: Ticks until due.
+        """
+        with self.__condition:
+            job = Job(bot, Action(*action))
+            job.remaining = remaining
+            self.__jobs.setdefault(bot, []).append(job)
+            self.__push(self.__current_tick() + max(delay, 0), job)
+            self.__condition.notify_all()
+
+    def cancel(self, bot: 'Bot') -> None:
+        """
+        Cancel all scheduled actions of a bot.
+        :param bot: Bot.
+        """
+        with self.__condition:
+            for job in self.__jobs.pop(bot, []):
+                job.cancelled = True
+
+    def clear(self) -> None:
+        """
+        Cancel all scheduled actions.
+        """
+        with self.__condition:
+            for jobs in self.__jobs.values():
+                for job in jobs:
+                    job.cancelled = True
+            self.__jobs.clear()
+            self.__heap.clear()
+
+    def stop(self) -> None:
+        """
+        Stop the scheduler thread.
+        """
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+        self.__thread.join()
+
+    def __current_tick(self) -> int:
+        return int((time.monotonic() - self.__start) / TICK)
+
+    def __push(self, tick: int, job: Job) -> None:
+        heapq.heappush(self.__heap, (tick, next(self.__sequence), job))
+
+    def __finish(self, job: Job) -> None:
+        jobs = self.__jobs.get(job.bot)
+        if jobs is not None and job in jobs:
+            jobs.remove(job)
+            if len(jobs) == 0:
+                del self.__jobs[job.bot]
+
+    def __loop(self) -> None:
+        while True:
+            with self.__condition:
+                # wait for due jobs
+                while not self.__stopped:
+                    if len(self.__heap) == 0:
+                        self.__condition.wait()
+                        continue
+                    delay = (
+                            self.__heap[0][0] * TICK -
+                            (time.monotonic() - self.__start)
+                    )
+                    if delay <= 0:
+                        break
+                    self.__condition.wait(delay)
+                if self.__stopped:
+                    return
+
+                # pop due jobs of this tick, limited by the cap
+                now = self.__current_tick()
+                limit = max(self.__plugin.config.action_commands_per_tick, 1)
+                commands = []
+                while (
+                        len(self.__heap) > 0 and
+                        self.__heap[0][0] <= now and
+                        len(commands) < limit
+                ):
+                    _, _, job = heapq.heappop(self.__heap)
+                    if job.cancelled:
+                        continue
+                    if not job.bot.online:
+                        self.__finish(job)
+                        continue
+                    commands.append(
+                        f'player {job.bot.mc_name} {job.action.command}'
+                    )
+
+                    # repeat
+                    if job.remaining is not None:
+                        job.remaining -= 1
+                    if job.remaining is None or job.remaining > 0:
+                        self.__push(now + max(job.action.interval, 1), job)
+                    else:
+                        self.__finish(job)
+
+            # execute
+            for command in commands:
+                self.__plugin.server.execute(command)
+            self.__command_count += len(commands)
+
+            # next tick
+            self.__sleep_to_next_tick()
+
+    def __sleep_to_next_tick(self) -> None:
+        next_tick = self.__current_tick() + 1
+        delay = next_tick * TICK - (time.monotonic() - self.__start)
+        if delay > 0:
+            with self.__condition:
+                self.__condition.wait_for(lambda: self.__stopped, delay)
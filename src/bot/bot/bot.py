@@ -1,19 +1,22 @@
-import time
+import itertools
 from typing import TYPE_CHECKING, List, Dict, Any
 
-from mcdreforged.api.decorator import new_thread
-
 from bot.exceptions import *
 from bot.location import Location
 
 if TYPE_CHECKING:
     from bot.plugin import Plugin
+    from bot.bot_index import BotIndex
+
+# global counter, so versions are never reused by another bot
+_versions = itertools.count(1)
 
 
 class Bot:
     def __init__(
             self,
             plugin: 'Plugin',
+            index: 'BotIndex',
             name: str,
             location: Location,
             comment: str,
@@ -25,6 +28,7 @@ class Bot:
     ):
         """
         :param plugin: Plugin.
+        :param index: BotIndex to keep updated.
         :param name: A string, name.
         :param location: A Location.
         :param comment: A string, comment.
@@ -36,6 +40,7 @@ class Bot:
         """
         self.__plugin: 'Plugin' = plugin
         self.__server = plugin.server
+        self.__index: 'BotIndex' = index
         self.__name = name
         self.__location = location
         self.__comment = comment
@@ -48,6 +53,8 @@ class Bot:
         self.__mc_name: str = ''
         self.__online: bool = False
         self.__saved: bool = False
+        self.__kill_pending: bool = False
+        self.__version: int = next(_versions)
 
     @property
     def name(self):
@@ -97,6 +104,20 @@ class Bot:
     def saved(self):
         return self.__saved
 
+    @property
+    def kill_pending(self) -> bool:
+        """
+        Killed with auto update, waiting for the location query.
+        """
+        return self.__kill_pending
+
+    @property
+    def version(self) -> int:
+        """
+        Version of the bot, changes whenever its data or status changes.
+        """
+        return self.__version
+
     @property
     def saving_data(self) -> Dict[str, Any]:
         """
@@ -106,8 +127,8 @@ class Bot:
         return {
             'name': self.name,
             'location': {
-                'position': self.location.position,
-                'facing': self.location.facing,
+                'position': list(self.location.position),
+                'facing': list(self.location.facing),
                 'dimension': self.location.dimension,
             },
             'comment': self.comment,
@@ -124,6 +145,8 @@ class Bot:
         :param name: Name.
         """
         self.__name = name
+        self.__version = next(_versions)
+        self.__plugin.event_bus.publish('config', self, field='name')
 
     def set_location(self, location: Location) -> None:
         """
@@ -131,6 +154,8 @@ class Bot:
         :param location: Location.
         """
         self.__location = location
+        self.__version = next(_versions)
+        self.__plugin.event_bus.publish('config', self, field='location')
 
     def set_comment(self, comment: str) -> None:
         """
@@ -138,6 +163,8 @@ class Bot:
         :param comment: Comment.
         """
         self.__comment = comment
+        self.__version = next(_versions)
+        self.__plugin.event_bus.publish('config', self, field='comment')
 
     def set_actions(self, actions: List[str]) -> None:
         """
@@ -145,6 +172,8 @@ class Bot:
         :param actions: Actions.
         """
         self.__actions = actions
+        self.__version = next(_versions)
+        self.__plugin.event_bus.publish('config', self, field='actions')
 
     def set_tags(self, tags: List[str]) -> None:
         """
@@ -152,6 +181,9 @@ class Bot:
         :param tags: Tags.
         """
         self.__tags = tags
+        self.__version = next(_versions)
+        self.__plugin.event_bus.publish('config', self, field='tags')
+        self.__index.update_tags(self)
 
     def set_auto_login(self, auto_login: bool) -> None:
         """
@@ -159,6 +191,8 @@ class Bot:
         :param auto_login: Auto login.
         """
         self.__auto_login = auto_login
+        self.__version = next(_versions)
+        self.__plugin.event_bus.publish('config', self, field='autoLogin')
 
     def set_auto_run_actions(self, auto_run_actions: bool) -> None:
         """
@@ -166,6 +200,8 @@ class Bot:
         :param auto_run_actions: Auto run actions.
         """
         self.__auto_run_actions = auto_run_actions
+        self.__version = next(_versions)
+        self.__plugin.event_bus.publish('config', self, field='autoRunActions')
 
     def set_auto_update(self, auto_update: bool) -> None:
         """
@@ -173,6 +209,15 @@ class Bot:
         :param auto_update: Auto update.
         """
         self.__auto_update = auto_update
+        self.__version = next(_versions)
+        self.__plugin.event_bus.publish('config', self, field='autoUpdate')
+
+    def set_mc_name(self, mc_name: str) -> None:
+        """
+        Set minecraft name.
+        :param mc_name: Name of the player entity.
+        """
+        self.__mc_name = mc_name
 
     def set_online(self, online: bool) -> None:
         """
@@ -180,6 +225,8 @@ class Bot:
         :param online: A bool.
         """
         self.__online = online
+        self.__version = next(_versions)
+        self.__index.update_online(self)
 
     def set_saved(self, saved: bool) -> None:
         """
@@ -187,6 +234,11 @@ class Bot:
         :param saved: A bool.
         """
         self.__saved = saved
+        self.__version = next(_versions)
+        self.__index.update_saved(self)
+        self.__plugin.event_bus.publish(
+            'save' if saved else 'delete', self
+        )
 
     def spawn(self) -> None:
         """
@@ -196,11 +248,12 @@ class Bot:
             self.__server.execute(
                 'player {} spawn at {} facing {} in {}'.format(
                     self.name,
-                    ' '.join(map(str, self.location.position)),
-                    ' '.join(map(str, self.location.facing)),
+                    self.location.command_position,
+                    self.location.command_facing,
                     self.location.str_dimension
                 )
             )
+            self.__plugin.event_bus.publish('spawn', self)
         else:
             raise BotOnlineException(self.name)
 
@@ -209,15 +262,16 @@ class Bot:
         Handler when bot spawned.
         """
         # set mc name
-        self.__mc_name = mc_name
+        self.set_mc_name(mc_name)
 
         # update online status
         self.set_online(True)
+        self.__plugin.event_bus.publish('join', self)
 
-        # delay
-        if self.__plugin.config.post_join_delay > 0:
-            time.sleep(self.__plugin.config.post_join_delay)
-
+    def setup(self) -> None:
+        """
+        Set up the bot after post join delay.
+        """
         # set gamemode
         if self.saved or self.__plugin.config.force_gamemode:
             self.__server.execute(
@@ -228,23 +282,40 @@ class Bot:
         if self.auto_run_actions:
             self.run_actions()
 
-    @new_thread('killBot')
     def kill(self) -> None:
         """
         Kill the bot.
+        Location query of auto update bots runs in the plugin executor.
         """
         if self.__online:
-            # auto update location
             if self.auto_update:
-                self.set_location(self.__plugin.get_location(self.mc_name))
-                self.__plugin.bot_manager.save_data()
-
-            # kill
-            self.set_online(False)
-            self.__server.execute(f'player {self.mc_name} kill')
+                self.__kill_pending = True
+                self.__plugin.executor.submit(self.__update_and_despawn)
+            else:
+                self.despawn()
         else:
             raise BotOfflineException(self.name)
 
+    def __update_and_despawn(self) -> None:
+        try:
+            # auto update location
+            self.set_location(self.__plugin.get_location(self.mc_name))
+            self.__plugin.bot_manager.save_data(self)
+
+            # kill
+            self.despawn()
+        finally:
+            self.__kill_pending = False
+
+    def despawn(self) -> None:
+        """
+        Kill the bot without updating its location.
+        """
+        self.set_online(False)
+        self.__plugin.bot_manager.action_scheduler.cancel(self)
+        self.__server.execute(f'player {self.mc_name} kill')
+        self.__plugin.event_bus.publish('kill', self)
+
     def run_actions(self, index: int = None) -> None:
         """
         :param index: Index of action. Run all actions if it's None.
@@ -260,9 +331,8 @@ class Bot:
             else:
                 raise IllegalActionIndexException(index)
 
-        # Run actions
-        for action in run_actions:
-            self.__server.execute(f'player {self.mc_name} {action}')
+        # Schedule actions
+        self.__plugin.bot_manager.action_scheduler.schedule(self, run_actions)
 
     def __str__(self):
         return (
@@ -0,0 +1,108 @@
+import threading
+from typing import TYPE_CHECKING, Dict, FrozenSet, List
+
+if TYPE_CHECKING:
+    from bot.bot import Bot
+
+
+class BotIndex:
+    """
+    Secondary indexes of bots by tag, online state and saved state.
+    Bots keep the index updated through their setters.
+    Dicts with None values are used as insertion ordered sets.
+    """
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.__tags: Dict[str, Dict['Bot', None]] = {}
+        self.__bot_tags: Dict['Bot', FrozenSet[str]] = {}
+        self.__online: Dict['Bot', None] = {}
+        self.__saved: Dict['Bot', None] = {}
+
+    @property
+    def tags(self) -> List[str]:
+        with self.__lock:
+            return list(self.__tags.keys())
+
+    @property
+    def online(self) -> List['Bot']:
+        with self.__lock:
+            return list(self.__online.keys())
+
+    @property
+    def saved(self) -> List['Bot']:
+        with self.__lock:
+            return list(self.__saved.keys())
+
+    def get_by_tag(self, tag: str) -> List['Bot']:
+        """
+        Get bots by tag.
+        :param tag: Tag.
+        :return: A list of bots.
+        """
+        with self.__lock:
+            return list(self.__tags.get(tag, {}).keys())
+
+    def add(self, bot: 'Bot') -> None:
+        """
+        Add a bot to all indexes.
+        :param bot: Bot.
+        """
+        with self.__lock:
+            self.update_tags(bot)
+            self.update_online(bot)
+            self.update_saved(bot)
+
+    def remove(self, bot: 'Bot') -> None:
+        """
+        Remove a bot from all indexes.
+        :param bot: Bot.
+        """
+        with self.__lock:
+            for tag in self.__bot_tags.pop(bot, frozenset()):
+                self.__discard_tag(tag, bot)
+            self.__online.pop(bot, None)
+            self.__saved.pop(bot, None)
+
+    def update_tags(self, bot: 'Bot') -> None:
+        """
+        Update tag index of a bot.
+        :param bot: Bot.
+        """
+        with self.__lock:
+            old_tags = self.__bot_tags.get(bot, frozenset())
+            new_tags = frozenset(bot.tags)
+            for tag in old_tags - new_tags:
+                self.__discard_tag(tag, bot)
+            for tag in new_tags - old_tags:
+                self.__tags.setdefault(tag, {})[bot] = None
+            self.__bot_tags[bot] = new_tags
+
+    def update_online(self, bot: 'Bot') -> None:
+        """
+        Update online index of a bot.
+        :param bot: Bot.
+        """
+        with self.__lock:
+            if bot.online:
+                self.__online[bot] = None
+            else:
+                self.__online.pop(bot, None)
+
+    def update_saved(self, bot: 'Bot') -> None:
+        """
+        Update saved index of a bot.
+        :param bot: Bot.
+        """
+        with self.__lock:
+            if bot.saved:
+                self.__saved[bot] = None
+            else:
+                self.__saved.pop(bot, None)
+
+    def __discard_tag(self, tag: str, bot: 'Bot') -> None:
+        bots = self.__tags.get(tag)
+        if bots is not None:
+            bots.pop(bot, None)
+            if len(bots) == 0:
+                del self.__tags[tag]
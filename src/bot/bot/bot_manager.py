@@ -1,30 +1,79 @@
 import math
 import datetime
-from typing import TYPE_CHECKING, Dict, List, Tuple
-
-from mcdreforged.api.decorator import new_thread
+from typing import (
+    TYPE_CHECKING, Any, ContextManager, Dict, Iterable, List, Optional,
+    Tuple
+)
 
 from bot.bot import Bot
+from bot.bot_index import BotIndex
 from bot.exceptions import *
 from bot.location import Location
-from bot.constants import DATA_FILE_NAME, BIN_FILE_NAME
+from bot.storage import DataStorage, BinStorage
+from bot.spawn_scheduler import SpawnScheduler
+from bot.action_scheduler import ActionScheduler
+from bot.constants import (
+    DATA_FILE_NAME,
+    BIN_FILE_NAME,
+    LEGACY_BIN_FILE_NAME
+)
 
 if TYPE_CHECKING:
     from bot.plugin import Plugin
 
 
 class BotManager:
-    def __init__(self, plugin: 'Plugin', prev_module):
+    def __init__(
+            self,
+            plugin: 'Plugin',
+            prev_module,
+            prev_state: Optional[Dict[str, Any]] = None
+    ):
         self.__plugin: 'Plugin' = plugin
         self.__bots: Dict[str, Bot] = {}
-
-        self.__load_data(prev_module)
+        self.__index = BotIndex()
+        self.__spawn_scheduler = SpawnScheduler(plugin)
+        self.__action_scheduler = ActionScheduler(plugin)
+        self.__storage = DataStorage(plugin, DATA_FILE_NAME)
+        self.__bin = BinStorage(plugin, BIN_FILE_NAME, LEGACY_BIN_FILE_NAME)
+
+        if prev_state is not None:
+            self.__restore_state(prev_state)
+        else:
+            self.__plugin.executor.submit(self.__load_data, prev_module)
 
     @property
     def bots(self) -> Dict[str, Bot]:
         return self.__bots
 
-    @new_thread('loadBot')
+    @property
+    def tags(self) -> List[str]:
+        return self.__index.tags
+
+    @property
+    def online_bots(self) -> List[Bot]:
+        return self.__index.online
+
+    @property
+    def saved_bots(self) -> List[Bot]:
+        return self.__index.saved
+
+    @property
+    def spawn_scheduler(self) -> SpawnScheduler:
+        return self.__spawn_scheduler
+
+    @property
+    def action_scheduler(self) -> ActionScheduler:
+        return self.__action_scheduler
+
+    @property
+    def storage(self) -> DataStorage:
+        return self.__storage
+
+    @property
+    def bin(self) -> BinStorage:
+        return self.__bin
+
     def __load_data(self, prev_module) -> None:
         # saved bots
         file_data = self.__plugin.server.load_config_simple(
@@ -32,23 +81,24 @@ class BotManager:
             default_config={'botList': []},
             echo_in_console=False
         )['botList']
-        for bot_data in file_data:
-            name = bot_data['name']
-            self.__bots[name] = self.new_bot(
-                name,
-                Location.from_dict(bot_data.get('location', {
-                    'position': [0.0, 0.0, 0.0],
-                    'facing': [0.0, 0.0],
-                    'dimension': 0
-                })),
-                bot_data.get('comment', ''),
-                bot_data.get('actions', []),
-                bot_data.get('tags', []),
-                bot_data.get('autoLogin', False),
-                bot_data.get('autoRunActions', False),
-                bot_data.get('autoUpdate', False)
-            )
-            self.__bots[name].set_saved(True)
+        skipped = False
+        try:
+            # loaded bots are not changes
+            with self.__plugin.event_bus.muted():
+                for bot_data in file_data:
+                    try:
+                        self.new_bot_from_data(bot_data).set_saved(True)
+                    except BotAlreadyExistsException as e:
+                        skipped = True
+                        self.__plugin.server.logger.warning(
+                            f'Skipped duplicated bot {e.name} '
+                            f'in {DATA_FILE_NAME}'
+                        )
+        finally:
+            # records of loaded bots, or a flush drops the others
+            self.__storage.reset(self.__bots.values())
+        if skipped:
+            self.save_data()
 
         # old bots
         if prev_module is not None:
@@ -58,53 +108,140 @@ class BotManager:
             for name in online_list:
                 name = self.__plugin.parse_name(name)
                 if old_self.is_in_list(name):
-                    self.__bots[name] = old_self.get_bot(name)
-                    self.__bots[name].set_online(True)
+                    old_bot = old_self.get_bot(name)
+                    if self.is_in_list(name):
+                        bot = self.get_bot(name)
+                    else:
+                        bot = self.new_bot_from_data(old_bot.saving_data)
+                    bot.set_mc_name(old_bot.mc_name)
+                    bot.set_online(True)
 
         self.__plugin.server.logger.debug(f'Loaded {len(self.bots)} bots:')
         for i in self.__bots.values():
             self.__plugin.server.logger.debug(f'  - {i}')
 
-    def save_data(self) -> None:
-        self.__plugin.server.save_config_simple(
-            {
-                "botList": [
-                    bot.saving_data
-                    for bot in self.__bots.values()
-                    if bot.saved
-                ]
-            },
-            DATA_FILE_NAME
+    def __restore_state(self, state: Dict[str, Any]) -> None:
+        # bots
+        kill_bots = []
+        with self.__plugin.event_bus.muted():
+            for bot_state in state['bots']:
+                bot = self.new_bot_from_data(bot_state['data'])
+                bot.set_mc_name(bot_state['mcName'])
+                if bot_state['online']:
+                    bot.set_online(True)
+                    if bot_state.get('killPending', False):
+                        kill_bots.append(bot)
+                if bot_state['saved']:
+                    bot.set_saved(True)
+        self.__storage.reset(self.__bots.values())
+
+        # kills not finished by the previous module
+        for bot in kill_bots:
+            bot.kill()
+
+        # pending spawns and actions
+        self.__spawn_scheduler.schedule(
+            self.__bots[name] for name in state['spawnQueue']
+            if name in self.__bots
+        )
+        for name, action, remaining, delay in state['actions']:
+            if name in self.__bots:
+                self.__action_scheduler.restore_job(
+                    self.__bots[name], action, remaining, delay
+                )
+
+        self.__plugin.server.logger.debug(
+            f'Restored {len(self.bots)} bots from the previous module'
         )
 
-    def save_bin(self, bot: Bot) -> None:
-        # read
-        bots = self.__plugin.server.load_config_simple(
-            BIN_FILE_NAME,
-            default_config={'botList': []},
-            echo_in_console=False
-        )['botList']
+    def export_state(self) -> Dict[str, Any]:
+        """
+        Export in-memory state as plain data, used to hand over on reload.
+        :return: A dict with bots, spawnQueue and actions.
+        """
+        return {
+            'bots': [
+                {
+                    'data': bot.saving_data,
+                    'mcName': bot.mc_name,
+                    'online': bot.online,
+                    'saved': bot.saved,
+                    # cancelled with the executor on unload
+                    'killPending': bot.kill_pending
+                }
+                for bot in list(self.__bots.values())
+            ],
+            'spawnQueue': [
+                bot.name for bot in self.__spawn_scheduler.queued_bots
+            ],
+            'actions': self.__action_scheduler.export_jobs()
+        }
+
+    def unload(self) -> None:
+        """
+        Stop background workers of the manager.
+        """
+        self.__spawn_scheduler.stop()
+        self.__action_scheduler.stop()
+        self.__storage.stop()
+
+    def save_data(self, *bots: Bot) -> None:
+        """
+        Mark bots changed, they will be written to the file after save delay.
+        :param bots: Changed bots, all bots if not provided.
+        """
+        if len(bots) == 0:
+            self.__storage.mark_all_dirty(self.__bots.values())
+        else:
+            self.__storage.mark_dirty(bots)
+
+    def batch(self) -> ContextManager[None]:
+        """
+        Hold data writes until the block exits, then write changes once.
+        """
+        return self.__storage.batch()
 
-        # add to list
+    def flush_data(self) -> None:
+        """
+        Write changed bots to the file immediately.
+        """
+        self.__storage.flush()
+
+    def save_bin(self, bot: Bot) -> None:
         data = bot.saving_data
         data['deleted_at'] = datetime.datetime.now(datetime.UTC).isoformat()
-        bots.append(data)
-
-        # save
-        self.__plugin.server.save_config_simple(
-            {"botList": bots},
-            BIN_FILE_NAME
-        )
+        self.__bin.append(data)
 
     def update_list(self) -> None:
         """
         Remove bots that not online or saved to clean the list.
         """
-        self.__bots = {
-            bot.name: bot
-            for bot in self.bots.values()
-            if bot.online or bot.saved
-        }
+        bots = {}
+        for bot in self.__bots.values():
+            if bot.online or bot.saved:
+                bots[bot.name] = bot
+
+        # not online or saved, or replaced by a bot with the same name
+        kept = set(bots.values())
+        removed = [bot for bot in self.__bots.values() if bot not in kept]
+        for bot in removed:
+            self.__index.remove(bot)
+        self.__storage.remove(removed)
+        self.__bots = bots
+
+    def rename(self, name: str, new_name: str) -> Bot:
+        """
+        Rename a bot.
+        :param name: Name of the bot.
+        :param new_name: New name.
+        :raises BotAlreadyExistsException: If the new name is used.
+        """
+        bot = self.get_bot(name)
+        if new_name != name and self.is_in_list(new_name):
+            raise BotAlreadyExistsException(new_name)
+        bot.set_name(new_name)
+        self.update_list()
+        return bot
 
     def get_bots_by_tag(self, tag: str) -> List[Bot]:
         """
@@ -112,10 +249,7 @@ class BotManager:
         :param tag: Tag.
         :return: A list of bots.
         """
-        return [
-            bot for bot in self.bots.values()
-            if tag in bot.tags
-        ]
+        return self.__index.get_by_tag(tag)
 
     def get_bot(self, name: str) -> Bot:
         """
@@ -128,6 +262,27 @@ class BotManager:
         else:
             raise BotNotExistsException(name)
 
+    def new_bot_from_data(self, bot_data: Dict[str, Any]) -> Bot:
+        """
+        Create a bot from its saving data.
+        :param bot_data: A dict, saving data of the bot.
+        :return: Bot.
+        """
+        return self.new_bot(
+            bot_data['name'],
+            Location.from_dict(bot_data.get('location', {
+                'position': [0.0, 0.0, 0.0],
+                'facing': [0.0, 0.0],
+                'dimension': 0
+            })),
+            bot_data.get('comment', ''),
+            bot_data.get('actions', []),
+            bot_data.get('tags', []),
+            bot_data.get('autoLogin', False),
+            bot_data.get('autoRunActions', False),
+            bot_data.get('autoUpdate', False)
+        )
+
     def new_bot(
             self,
             name: str,
@@ -156,12 +311,14 @@ class BotManager:
             tags = []
 
         if not self.is_in_list(name):
-            self.__bots[name] = Bot(
-                self.__plugin,
+            bot = Bot(
+                self.__plugin, self.__index,
                 name, location, comment, actions, tags,
                 auto_login, auto_run_actions, auto_update
             )
-            return self.__bots[name]
+            self.__bots[name] = bot
+            self.__index.add(bot)
+            return bot
         else:
             raise BotAlreadyExistsException(name)
 
@@ -172,6 +329,24 @@ class BotManager:
         """
         return name in self.__bots.keys()
 
+    def query(self, tag: str = None, online: bool = None) -> List[Bot]:
+        """
+        Query bots from indexes, sorted by name.
+        :param tag: Tag, only include bots with this tag if not None.
+        :param online: Online status, only include bots with this status if
+            not None.
+        :return: A list of bots.
+        """
+        if tag is not None:
+            bots = self.__index.get_by_tag(tag)
+        elif online:
+            bots = self.__index.online
+        else:
+            bots = list(self.__bots.values())
+        if online is not None:
+            bots = [bot for bot in bots if bot.online == online]
+        return sorted(bots, key=lambda bot: bot.name)
+
     def list(
             self,
             index: int,
@@ -187,13 +362,23 @@ class BotManager:
         :param tag: Tag, only include bots with this tag if not None.
         :return: A list of bots.
         """
+        # Candidates from indexes
+        if tag is not None:
+            candidates = self.__index.get_by_tag(tag)
+        elif online and saved:
+            candidates = list(self.__bots.values())
+        elif online:
+            candidates = self.__index.online
+        elif saved:
+            candidates = self.__index.saved
+        else:
+            candidates = []
+
         # Filter bots by online and saved
-        bots = []
-        for bot in self.bots.values():
-            condition = (online and bot.online) or (saved and bot.saved)
-            condition = condition and (tag is None or tag in bot.tags)
-            if condition:
-                bots.append(bot)
+        bots = [
+            bot for bot in candidates
+            if (online and bot.online) or (saved and bot.saved)
+        ]
 
         # Check index and filter bots to page
         max_index = math.ceil(len(bots) / 10) - 1
@@ -246,9 +431,40 @@ class BotManager:
         else:
             raise BotNotExistsException(name)
 
+    def kill_bots(self, bots: Iterable[Bot]) -> List[Bot]:
+        """
+        Kill many bots at once.
+        Locations of auto update bots are fetched concurrently and saved
+        together.
+        :param bots: Bots to kill, offline bots are ignored.
+        :return: A list of killed bots.
+        """
+        bots = [bot for bot in bots if bot.online]
+
+        # Auto update location
+        auto_update_bots = [bot for bot in bots if bot.auto_update]
+        if len(auto_update_bots) > 0:
+            locations = self.__plugin.get_locations(
+                bot.mc_name for bot in auto_update_bots
+            )
+            updated_bots = []
+            for bot in auto_update_bots:
+                location = locations.get(bot.mc_name)
+                if location is not None:
+                    bot.set_location(location)
+                    updated_bots.append(bot)
+            if len(updated_bots) > 0:
+                self.save_data(*updated_bots)
+
+        # Kill
+        for bot in bots:
+            bot.despawn()
+        self.update_list()
+        return bots
+
     def action(self, name: str, index: int = None) -> Bot:
         """
-        Run actions of a bot.
+        Schedule actions of a bot.
         :param name: Name of the bot.
         :param index: Index of the action.
         """
@@ -262,6 +478,18 @@ class BotManager:
         else:
             raise BotNotExistsException(name)
 
+    def stop_actions(self, name: str) -> Bot:
+        """
+        Cancel scheduled actions of a bot.
+        :param name: Name of the bot.
+        """
+        if self.is_in_list(name):
+            bot = self.get_bot(name)
+            self.__action_scheduler.cancel(bot)
+            return bot
+        else:
+            raise BotNotExistsException(name)
+
     def save(
             self,
             name: str,
@@ -310,7 +538,7 @@ class BotManager:
         # Save
         if not bot.saved:
             bot.set_saved(True)
-            self.save_data()
+            self.save_data(bot)
             return bot
         else:
             raise BotAlreadySavedException(name)
@@ -330,8 +558,28 @@ class BotManager:
         if bot.saved:
             bot.set_saved(False)
             self.update_list()
-            self.save_data()
+            self.save_data(bot)
             self.save_bin(bot)
             return bot
         else:
             raise BotNotSavedException(name)
+
+    def restore(self, name: str) -> Bot:
+        """
+        Restore the latest deleted bot from the bin.
+        :param name: Name of the bot.
+        """
+        # Check
+        if self.is_in_list(name):
+            raise BotAlreadyExistsException(name)
+
+        # Get record
+        bot_data = self.__bin.pop(name)
+        if bot_data is None:
+            raise BotNotExistsException(name)
+
+        # Restore
+        bot = self.new_bot_from_data(bot_data)
+        bot.set_saved(True)
+        self.save_data(bot)
+        return bot
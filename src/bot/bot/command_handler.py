@@ -1,12 +1,13 @@
+import weakref
 from enum import Enum
-from typing import TYPE_CHECKING, List, Set, Callable
+from typing import TYPE_CHECKING, List, Set, Callable, Tuple
 
 from mcdreforged.api.types import CommandSource
 from mcdreforged.api.command import *
 from mcdreforged.api.rtext import *
-from mcdreforged.api.decorator import new_thread
 from more_command_nodes import Position, Facing, EnumeratedText
 
+from bot.bot import Bot
 from bot.exceptions import *
 from bot.constants import DIMENSION
 from bot.location import Location
@@ -14,19 +15,91 @@ from bot.location import Location
 if TYPE_CHECKING:
     from bot.plugin import Plugin
 
+# Static fragments, shared by all rendered messages and never modified.
+# Translations are resolved when a message is sent, so sharing is safe.
+LIST_SPAWN_HOVER = RTextMCDRTranslation('bot.list.spawnButton')
+LIST_KILL_HOVER = RTextMCDRTranslation('bot.list.killButton')
+LIST_ACTION_HOVER = RTextMCDRTranslation('bot.list.actionButton')
+LIST_DELETE_HOVER = RTextMCDRTranslation('bot.list.deleteButton')
+CONFIG_BUTTON_HOVER = RTextMCDRTranslation(
+    'bot.command.info.configButtonHover'
+)
+VOXEL_BUTTON_HOVER = RTextMCDRTranslation(
+    'bot.command.info.position.voxelButton'
+)
+XAEROS_BUTTON_HOVER = RTextMCDRTranslation(
+    'bot.command.info.position.xearosButton'
+)
+ACTIONS_TITLE = RTextMCDRTranslation('bot.command.info.actions')
+ACTIONS_ALL_HOVER = RTextMCDRTranslation(
+    'bot.command.info.actions.actionButtonAll'
+)
+ACTIONS_CLEAR_HOVER = RTextMCDRTranslation(
+    'bot.command.info.actions.clearButton'
+)
+ACTIONS_APPEND_HOVER = RTextMCDRTranslation(
+    'bot.command.info.actions.appendButton'
+)
+TAGS_TITLE = RTextMCDRTranslation('bot.command.info.tags')
+TAGS_CLEAR_HOVER = RTextMCDRTranslation('bot.command.info.tags.clearButton')
+TAGS_APPEND_HOVER = RTextMCDRTranslation(
+    'bot.command.info.tags.appendButton'
+)
+
+
+def get_config_button(
+        bot_name: str,
+        config: str,
+        default_value: str = None
+) -> RText:
+    """
+    Get a RText config button.
+    :param bot_name: Name of the bot.
+    :param config: Config name.
+    :param default_value: Default value of the config.
+    :return: RText.
+    """
+    if default_value is None:
+        default_value = ''
+
+    return (
+        RText('[✐]', color=RColor.gray)
+        .h(CONFIG_BUTTON_HOVER)
+        .c(
+            RAction.suggest_command,
+            f'!!bot config {bot_name} {config} {default_value}'
+        )
+    )
+
 
 class CommandHandler:
     def __init__(self, plugin: 'Plugin'):
         self.__plugin: 'Plugin' = plugin
+
+        # bot -> (version, rendered message)
+        self.__list_row_cache: weakref.WeakKeyDictionary[
+            Bot, Tuple[int, RTextBase]
+        ] = weakref.WeakKeyDictionary()
+        self.__info_cache: weakref.WeakKeyDictionary[
+            Bot, Tuple[int, RTextBase]
+        ] = weakref.WeakKeyDictionary()
+
         self.register_commands()
 
     def register_commands(self):
         def bot_list(online: bool = None) -> Callable[[], List[str]]:
-            return lambda: [
-                name for name, bot in
-                self.__plugin.bot_manager.bots.items()
-                if online is None or bot.online == online
-            ]
+            if online is None:
+                return lambda: list(self.__plugin.bot_manager.bots.keys())
+            elif online:
+                return lambda: [
+                    bot.name for bot in self.__plugin.bot_manager.online_bots
+                ]
+            else:
+                return lambda: [
+                    name for name, bot in
+                    self.__plugin.bot_manager.bots.items()
+                    if not bot.online
+                ]
 
         def create_subcommand(literal: str) -> Literal:
             node = Literal(literal)
@@ -37,6 +110,12 @@ class CommandHandler:
             )
             return node
 
+        def in_executor(callback: Callable) -> Callable:
+            # run blocking commands in the shared executor
+            return lambda src, ctx: self.__plugin.executor.submit(
+                callback, src, ctx
+            )
+
         def make_list_command() -> Literal:
             list_literal = create_subcommand('list').runs(self.__command_list)
             list_literal.then(
@@ -61,7 +140,7 @@ class CommandHandler:
             spawn_literal = create_subcommand('spawn')
             spawn_literal.then(
                 Text('name')
-                .runs(self.__command_spawn)
+                .runs(in_executor(self.__command_spawn))
                 .suggests(bot_list(False))
             )
             return spawn_literal
@@ -85,6 +164,10 @@ class CommandHandler:
                     Integer('index')
                     .runs(self.__command_action)
                 )
+                .then(
+                    Literal('stop')
+                    .runs(self.__command_action_stop)
+                )
             )
             return action_literal
 
@@ -100,7 +183,7 @@ class CommandHandler:
                 )
                 .then(
                     Literal('kill')
-                    .runs(self.__command_tag_kill)
+                    .runs(in_executor(self.__command_tag_kill))
                 )
             )
             return tags_literal
@@ -118,16 +201,16 @@ class CommandHandler:
             save_literal = create_subcommand('save')
             save_literal.then(
                 Text('name')
-                .runs(self.__command_save)
+                .runs(in_executor(self.__command_save))
                 .then(
                     Position('position')
-                    .runs(self.__command_save)
+                    .runs(in_executor(self.__command_save))
                     .then(
                         Facing('facing')
-                        .runs(self.__command_save)
+                        .runs(in_executor(self.__command_save))
                         .then(
                             Text('dimension')
-                            .runs(self.__command_save)
+                            .runs(in_executor(self.__command_save))
                         )
                     )
                 )
@@ -143,6 +226,14 @@ class CommandHandler:
             )
             return del_literal
 
+        def make_restore_command() -> Literal:
+            restore_literal = create_subcommand('restore')
+            restore_literal.then(
+                Text('name')
+                .runs(self.__command_restore)
+            )
+            return restore_literal
+
         def make_config_command() -> Literal:
             config_literal = create_subcommand('config')
             config_literal.then(
@@ -310,14 +401,278 @@ class CommandHandler:
             .then(make_info_command())
             .then(make_save_command())
             .then(make_del_command())
+            .then(make_restore_command())
             .then(make_config_command())
         )
 
     def tag_list(self) -> Set[str]:
-        tags = []
-        for bot in self.__plugin.bot_manager.bots.values():
-            tags += bot.tags
-        return set(tags)
+        return set(self.__plugin.bot_manager.tags)
+
+    @staticmethod
+    def __get_rendered(
+            cache: 'weakref.WeakKeyDictionary[Bot, Tuple[int, RTextBase]]',
+            bot: Bot,
+            render: Callable[[Bot], RTextBase]
+    ) -> RTextBase:
+        """
+        Get a rendered message of a bot from cache, render it again only
+        when the version of the bot changed.
+        :param cache: Cache of the message.
+        :param bot: Bot.
+        :param render: Render function.
+        :return: RTextBase.
+        """
+        # read version before rendering, a stale render is never marked fresh
+        version = bot.version
+        cached = cache.get(bot)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        message = render(bot)
+        cache[bot] = (version, message)
+        return message
+
+    @staticmethod
+    def __render_list_row(bot: Bot) -> RTextBase:
+        spawn_button = (
+            RText(
+                '[↑]', color=RColor.green
+            )
+            .h(LIST_SPAWN_HOVER)
+            .c(RAction.run_command, f'!!bot spawn {bot.name}')
+        )
+        kill_button = (
+            RText(
+                '[↓]', color=RColor.yellow
+            )
+            .h(LIST_KILL_HOVER)
+            .c(RAction.run_command, f'!!bot kill {bot.name}')
+        )
+        action_button = (
+            RText(
+                '[▶]', color=RColor.blue
+            )
+            .h(LIST_ACTION_HOVER)
+            .c(RAction.run_command, f'!!bot action {bot.name}')
+        )
+        info_button = (
+            RText(
+                '[?]', color=RColor.gray
+            )
+            .h(
+                RTextMCDRTranslation(
+                    'bot.list.infoButton',
+                    bot.name, bot.location.display_position,
+                    bot.location.display_facing,
+                    bot.location.display_dimension,
+                    bot.comment, bot.actions, bot.tags,
+                    bot.auto_login, bot.auto_run_actions,
+                    bot.auto_update
+                )
+            )
+            .c(RAction.run_command, f'!!bot info {bot.name}')
+        )
+        delete_button = (
+            RText(
+                '[×]', color=RColor.red
+            )
+            .h(LIST_DELETE_HOVER)
+            .c(RAction.run_command, f'!!bot del {bot.name}')
+        )
+        name = RText(
+            bot.display_name,
+            color=RColor.green if bot.online else RColor.gray
+        )
+        return RTextList(
+            '\n',
+            spawn_button, ' ', kill_button, ' ', action_button, ' ',
+            info_button, ' ', delete_button, ' ', name
+        )
+
+    @staticmethod
+    def __render_info(bot: Bot) -> RTextBase:
+        minimap_button = RTextList(
+            RText('[+V]', color=RColor.aqua)
+            .h(VOXEL_BUTTON_HOVER)
+            .c(
+                RAction.run_command,
+                '/newWaypoint x:{}, y:{}, z:{}, dim:{}'.format(
+                    int(bot.location.position[0]),
+                    int(bot.location.position[1]),
+                    int(bot.location.position[2]),
+                    bot.location.str_dimension
+                )
+            ),
+            ' ',
+            RText('[+X]', color=RColor.gold)
+            .h(XAEROS_BUTTON_HOVER)
+            .c(
+                RAction.run_command,
+                (
+                    "xaero_waypoint_add:{}'s Location"
+                    ":{}:{}:{}:{}:6:false:0:Internal_{}_waypoints"
+                ).format(
+                    bot.name,
+                    bot.name[0],
+                    int(bot.location.position[0]),
+                    int(bot.location.position[1]),
+                    int(bot.location.position[2]),
+                    bot.location.str_dimension.replace('minecraft:', '')
+                )
+            )
+        )
+        actions_info = RTextList(
+            ACTIONS_TITLE, ' ',
+            RText('[▶]', color=RColor.blue)
+            .h(ACTIONS_ALL_HOVER)
+            .c(RAction.run_command, f'!!bot action {bot.name}'), ' ',
+            RText('[×]', color=RColor.red)
+            .h(ACTIONS_CLEAR_HOVER)
+            .c(
+                RAction.run_command,
+                f'!!bot config {bot.name} actions clear'
+            ),
+            *[
+                RTextList(
+                    '\n', '  ',
+                    get_config_button(
+                        bot.name, f'actions edit {index}', action
+                    ), ' ',
+                    RText('[▶]', color=RColor.blue)
+                    .h(
+                        RTextMCDRTranslation(
+                            'bot.command.info.actions.actionButtonIndex',
+                            index
+                        )
+                    )
+                    .c(
+                        RAction.run_command,
+                        f'!!bot action {bot.name} {index}'
+                    ), ' ',
+                    RText('[×]', color=RColor.red)
+                    .h(
+                        RTextMCDRTranslation(
+                            'bot.command.info.actions.deleteButton', index
+                        )
+                    )
+                    .c(
+                        RAction.run_command,
+                        f'!!bot config {bot.name} actions delete {index}'
+                    ), ' ',
+                    f'§3{index}. {action}',
+                )
+                for index, action
+                in enumerate(bot.actions)
+            ], '\n', '                ',
+            RText('[+]', color=RColor.green)
+            .h(ACTIONS_APPEND_HOVER)
+            .c(
+                RAction.suggest_command,
+                f'!!bot config {bot.name} actions append '
+            )
+        )
+        tags_info = RTextList(
+            TAGS_TITLE, ' ',
+            RText('[×]', color=RColor.red)
+            .h(TAGS_CLEAR_HOVER)
+            .c(
+                RAction.run_command,
+                f'!!bot config {bot.name} tags clear'
+            ),
+            *[
+                RTextList(
+                    '\n', '  ',
+                    get_config_button(
+                        bot.name, f'tags edit {index}', tag
+                    ), ' ',
+                    RText('[×]', color=RColor.red)
+                    .h(
+                        RTextMCDRTranslation(
+                            'bot.command.info.tags.deleteButton', index
+                        )
+                    )
+                    .c(
+                        RAction.run_command,
+                        f'!!bot config {bot.name} tags delete {index}'
+                    ), ' ',
+                    f'§3{index}. {tag}',
+                )
+                for index, tag
+                in enumerate(bot.tags)
+            ], '\n', '                ',
+            RText('[+]', color=RColor.green)
+            .h(TAGS_APPEND_HOVER)
+            .c(
+                RAction.suggest_command,
+                f'!!bot config {bot.name} tags append '
+            )
+        )
+        return RTextList(
+            '----------------', '\n',
+            get_config_button(
+                bot.name, 'name', bot.name
+            ), ' ',
+            RTextMCDRTranslation(
+                'bot.command.info.name',
+                bot.name
+            ), '\n',
+            get_config_button(
+                bot.name, 'position', bot.location.command_position
+            ), ' ',
+            RTextMCDRTranslation(
+                'bot.command.info.position',
+                bot.location.display_position
+            ), ' ', minimap_button, '\n',
+            get_config_button(
+                bot.name, 'facing', bot.location.command_facing
+            ), ' ',
+            RTextMCDRTranslation(
+                'bot.command.info.facing',
+                bot.location.display_facing
+            ), '\n',
+            get_config_button(
+                bot.name, 'dimension', bot.location.dimension
+            ), ' ',
+            RTextMCDRTranslation(
+                'bot.command.info.dimension',
+                bot.location.display_dimension
+            ), '\n',
+            get_config_button(
+                bot.name, 'comment', bot.comment
+            ), ' ',
+            RTextMCDRTranslation(
+                'bot.command.info.comment',
+                bot.comment
+            ), '\n',
+            get_config_button(
+                bot.name, 'actions'
+            ), ' ',
+            actions_info, '\n',
+            get_config_button(
+                bot.name, 'tags'
+            ), ' ',
+            tags_info, '\n',
+            get_config_button(
+                bot.name, 'autoLogin'
+            ), ' ',
+            RTextMCDRTranslation(
+                'bot.command.info.autoLogin',
+                bot.auto_login
+            ), '\n',
+            get_config_button(
+                bot.name, 'autoRunActions'
+            ), ' ',
+            RTextMCDRTranslation(
+                'bot.command.info.autoRunActions',
+                bot.auto_run_actions
+            ), '\n',
+            get_config_button(
+                bot.name, 'autoUpdate'
+            ), ' ',
+            RTextMCDRTranslation(
+                'bot.command.info.autoUpdate',
+                bot.auto_update
+            ), '\n',
+        )
 
     def __command_list(self, src: CommandSource, ctx: CommandContext):
         show_online = ctx.get('online', 0) > 0
@@ -339,59 +694,8 @@ class CommandHandler:
 
             # Body
             for bot in bot_list:
-                spawn_button = (
-                    RText(
-                        '[↑]', color=RColor.green
-                    )
-                    .h(RTextMCDRTranslation('bot.list.spawnButton'))
-                    .c(RAction.run_command, f'!!bot spawn {bot.name}')
-                )
-                kill_button = (
-                    RText(
-                        '[↓]', color=RColor.yellow
-                    )
-                    .h(RTextMCDRTranslation('bot.list.killButton'))
-                    .c(RAction.run_command, f'!!bot kill {bot.name}')
-                )
-                action_button = (
-                    RText(
-                        '[▶]', color=RColor.blue
-                    )
-                    .h(RTextMCDRTranslation('bot.list.actionButton'))
-                    .c(RAction.run_command, f'!!bot action {bot.name}')
-                )
-                info_button = (
-                    RText(
-                        '[?]', color=RColor.gray
-                    )
-                    .h(
-                        RTextMCDRTranslation(
-                            'bot.list.infoButton',
-                            bot.name, bot.location.rounded_position,
-                            bot.location.rounded_facing,
-                            bot.location.display_dimension,
-                            bot.comment, bot.actions, bot.tags,
-                            bot.auto_login, bot.auto_run_actions,
-                            bot.auto_update
-                        )
-                    )
-                    .c(RAction.run_command, f'!!bot info {bot.name}')
-                )
-                delete_button = (
-                    RText(
-                        '[×]', color=RColor.red
-                    )
-                    .h(RTextMCDRTranslation('bot.list.deleteButton'))
-                    .c(RAction.run_command, f'!!bot del {bot.name}')
-                )
-                name = RText(
-                    bot.display_name,
-                    color=RColor.green if bot.online else RColor.gray
-                )
-                message.append(RTextList(
-                    '\n',
-                    spawn_button, ' ', kill_button, ' ', action_button, ' ',
-                    info_button, ' ', delete_button, ' ', name
+                message.append(self.__get_rendered(
+                    self.__list_row_cache, bot, self.__render_list_row
                 ))
 
             # Index footer
@@ -427,7 +731,6 @@ class CommandHandler:
                 RTextMCDRTranslation('bot.error.illegalListIndex', index)
             )
 
-    @new_thread('commandSpawn')
     def __command_spawn(self, src: CommandSource, ctx: CommandContext):
         name = self.__plugin.parse_name(ctx['name'])
         try:
@@ -467,6 +770,14 @@ class CommandHandler:
                 'bot.error.illegalActionIndex', e.index
             ))
 
+    def __command_action_stop(self, src: CommandSource, ctx: CommandContext):
+        name = self.__plugin.parse_name(ctx['name'])
+        try:
+            self.__plugin.bot_manager.stop_actions(name)
+            src.reply(RTextMCDRTranslation('bot.command.actionStopped', name))
+        except BotNotExistsException as e:
+            src.reply(RTextMCDRTranslation('bot.error.botNotExists', e.name))
+
     def __command_tag_list(self, src: CommandSource):
         # header
         message = RTextList('-------- List --------')
@@ -511,11 +822,9 @@ class CommandHandler:
                 raise TagNotExistsException(tag)
 
             # spawn
-            counter = 0
-            for bot in self.__plugin.bot_manager.get_bots_by_tag(tag):
-                if not bot.online:
-                    bot.spawn()
-                    counter += 1
+            counter = self.__plugin.bot_manager.spawn_scheduler.schedule(
+                self.__plugin.bot_manager.get_bots_by_tag(tag)
+            )
 
             # reply
             src.reply(RTextMCDRTranslation(
@@ -531,12 +840,10 @@ class CommandHandler:
             if tag not in self.tag_list():
                 raise TagNotExistsException(tag)
 
-            # spawn
-            counter = 0
-            for bot in self.__plugin.bot_manager.get_bots_by_tag(tag):
-                if bot.online:
-                    bot.kill()
-                    counter += 1
+            # kill
+            counter = len(self.__plugin.bot_manager.kill_bots(
+                self.__plugin.bot_manager.get_bots_by_tag(tag)
+            ))
 
             # reply
             src.reply(RTextMCDRTranslation(
@@ -547,252 +854,14 @@ class CommandHandler:
 
     def __command_info(self, src: CommandSource, ctx: CommandContext):
         name = self.__plugin.parse_name(ctx['name'])
-
-        def get_config_button(
-                bot_name: str,
-                config: str,
-                default_value: str = None
-        ) -> RText:
-            """
-            Get a RText config button.
-            :param bot_name: Name of the bot.
-            :param config: Config name.
-            :param default_value: Default value of the config.
-            :return: RText.
-            """
-            if default_value is None:
-                default_value = ''
-
-            return (
-                RText('[✐]', color=RColor.gray)
-                .h(
-                    RTextMCDRTranslation('bot.command.info.configButtonHover')
-                )
-                .c(
-                    RAction.suggest_command,
-                    f'!!bot config {bot_name} {config} {default_value}'
-                )
-            )
-
         try:
             bot = self.__plugin.bot_manager.get_bot(name)
-            minimap_button = RTextList(
-                RText('[+V]', color=RColor.aqua)
-                .h(
-                    RTextMCDRTranslation(
-                        'bot.command.info.position.voxelButton'
-                    )
-                )
-                .c(
-                    RAction.run_command,
-                    '/newWaypoint x:{}, y:{}, z:{}, dim:{}'.format(
-                        int(bot.location.position[0]),
-                        int(bot.location.position[1]),
-                        int(bot.location.position[2]),
-                        bot.location.str_dimension
-                    )
-                ),
-                ' ',
-                RText('[+X]', color=RColor.gold)
-                .h(
-                    RTextMCDRTranslation(
-                        'bot.command.info.position.xearosButton'
-                    )
-                )
-                .c(
-                    RAction.run_command,
-                    (
-                        "xaero_waypoint_add:{}'s Location"
-                        ":{}:{}:{}:{}:6:false:0:Internal_{}_waypoints"
-                    ).format(
-                        bot.name,
-                        bot.name[0],
-                        int(bot.location.position[0]),
-                        int(bot.location.position[1]),
-                        int(bot.location.position[2]),
-                        bot.location.str_dimension.replace('minecraft:', '')
-                    )
-                )
-            )
-            actions_info = RTextList(
-                RTextMCDRTranslation('bot.command.info.actions'), ' ',
-                RText('[▶]', color=RColor.blue)
-                .h(
-                    RTextMCDRTranslation(
-                        'bot.command.info.actions.actionButtonAll'
-                    )
-                )
-                .c(RAction.run_command, f'!!bot action {bot.name}'), ' ',
-                RText('[×]', color=RColor.red)
-                .h(
-                    RTextMCDRTranslation(
-                        'bot.command.info.actions.clearButton'
-                    )
-                )
-                .c(
-                    RAction.run_command,
-                    f'!!bot config {bot.name} actions clear'
-                ),
-                *[
-                    RTextList(
-                        '\n', '  ',
-                        get_config_button(
-                            bot.name, f'actions edit {index}', action
-                        ), ' ',
-                        RText('[▶]', color=RColor.blue)
-                        .h(
-                            RTextMCDRTranslation(
-                                'bot.command.info.actions.actionButtonIndex',
-                                index
-                            )
-                        )
-                        .c(
-                            RAction.run_command,
-                            f'!!bot action {bot.name} {index}'
-                        ), ' ',
-                        RText('[×]', color=RColor.red)
-                        .h(
-                            RTextMCDRTranslation(
-                                'bot.command.info.actions.deleteButton', index
-                            )
-                        )
-                        .c(
-                            RAction.run_command,
-                            f'!!bot config {bot.name} actions delete {index}'
-                        ), ' ',
-                        f'§3{index}. {action}',
-                    )
-                    for index, action
-                    in enumerate(bot.actions)
-                ], '\n', '                ',
-                RText('[+]', color=RColor.green)
-                .h(
-                    RTextMCDRTranslation(
-                        'bot.command.info.actions.appendButton'
-                    )
-                )
-                .c(
-                    RAction.suggest_command,
-                    f'!!bot config {bot.name} actions append '
-                )
-            )
-            tags_info = RTextList(
-                RTextMCDRTranslation('bot.command.info.tags'), ' ',
-                RText('[×]', color=RColor.red)
-                .h(
-                    RTextMCDRTranslation(
-                        'bot.command.info.tags.clearButton'
-                    )
-                )
-                .c(
-                    RAction.run_command,
-                    f'!!bot config {bot.name} tags clear'
-                ),
-                *[
-                    RTextList(
-                        '\n', '  ',
-                        get_config_button(
-                            bot.name, f'tags edit {index}', tag
-                        ), ' ',
-                        RText('[×]', color=RColor.red)
-                        .h(
-                            RTextMCDRTranslation(
-                                'bot.command.info.tags.deleteButton', index
-                            )
-                        )
-                        .c(
-                            RAction.run_command,
-                            f'!!bot config {bot.name} tags delete {index}'
-                        ), ' ',
-                        f'§3{index}. {tag}',
-                    )
-                    for index, tag
-                    in enumerate(bot.tags)
-                ], '\n', '                ',
-                RText('[+]', color=RColor.green)
-                .h(
-                    RTextMCDRTranslation(
-                        'bot.command.info.tags.appendButton'
-                    )
-                )
-                .c(
-                    RAction.suggest_command,
-                    f'!!bot config {bot.name} tags append '
-                )
-            )
-            src.reply(RTextList(
-                '----------------', '\n',
-                get_config_button(
-                    bot.name, 'name', bot.name
-                ), ' ',
-                RTextMCDRTranslation(
-                    'bot.command.info.name',
-                    bot.name
-                ), '\n',
-                get_config_button(
-                    bot.name, 'position',
-                    ' '.join(map(str, bot.location.position))
-                ), ' ',
-                RTextMCDRTranslation(
-                    'bot.command.info.position',
-                    bot.location.rounded_position
-                ), ' ', minimap_button, '\n',
-                get_config_button(
-                    bot.name, 'facing',
-                    ' '.join(map(str, bot.location.facing))
-                ), ' ',
-                RTextMCDRTranslation(
-                    'bot.command.info.facing',
-                    bot.location.rounded_facing
-                ), '\n',
-                get_config_button(
-                    bot.name, 'dimension', bot.location.dimension
-                ), ' ',
-                RTextMCDRTranslation(
-                    'bot.command.info.dimension',
-                    bot.location.display_dimension
-                ), '\n',
-                get_config_button(
-                    bot.name, 'comment', bot.comment
-                ), ' ',
-                RTextMCDRTranslation(
-                    'bot.command.info.comment',
-                    bot.comment
-                ), '\n',
-                get_config_button(
-                    bot.name, 'actions'
-                ), ' ',
-                actions_info, '\n',
-                get_config_button(
-                    bot.name, 'tags'
-                ), ' ',
-                tags_info, '\n',
-                get_config_button(
-                    bot.name, 'autoLogin'
-                ), ' ',
-                RTextMCDRTranslation(
-                    'bot.command.info.autoLogin',
-                    bot.auto_login
-                ), '\n',
-                get_config_button(
-                    bot.name, 'autoRunActions'
-                ), ' ',
-                RTextMCDRTranslation(
-                    'bot.command.info.autoRunActions',
-                    bot.auto_run_actions
-                ), '\n',
-                get_config_button(
-                    bot.name, 'autoUpdate'
-                ), ' ',
-                RTextMCDRTranslation(
-                    'bot.command.info.autoUpdate',
-                    bot.auto_update
-                ), '\n',
+            src.reply(self.__get_rendered(
+                self.__info_cache, bot, self.__render_info
             ))
         except BotNotExistsException as e:
             src.reply(RTextMCDRTranslation('bot.error.botNotExists', e.name))
 
-    @new_thread('commandSave')
     def __command_save(self, src: CommandSource, ctx: CommandContext):
         name = self.__plugin.parse_name(ctx['name'])
         position = ctx.get('position')
@@ -829,13 +898,24 @@ class CommandHandler:
         except BotNotSavedException as e:
             src.reply(RTextMCDRTranslation('bot.error.botNotSaved', e.name))
 
+    def __command_restore(self, src: CommandSource, ctx: CommandContext):
+        name = self.__plugin.parse_name(ctx['name'])
+        try:
+            self.__plugin.bot_manager.restore(name)
+            src.reply(RTextMCDRTranslation('bot.command.restored', name))
+        except BotAlreadyExistsException as e:
+            src.reply(
+                RTextMCDRTranslation('bot.error.botAlreadyExists', e.name)
+            )
+        except BotNotExistsException as e:
+            src.reply(RTextMCDRTranslation('bot.error.botNotInBin', e.name))
+
     def __command_config_name(self, src: CommandSource, ctx: CommandContext):
         name = self.__plugin.parse_name(ctx['name'])
         new_name = self.__plugin.parse_name(ctx['newName'])
         try:
-            self.__plugin.bot_manager.get_bot(name).set_name(new_name)
-            self.__plugin.bot_manager.update_list()
-            self.__plugin.bot_manager.save_data()
+            bot = self.__plugin.bot_manager.rename(name, new_name)
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'name', new_name
@@ -843,6 +923,10 @@ class CommandHandler:
             )
         except BotNotExistsException as e:
             src.reply(RTextMCDRTranslation('bot.error.botNotExists', e.name))
+        except BotAlreadyExistsException as e:
+            src.reply(
+                RTextMCDRTranslation('bot.error.botAlreadyExists', e.name)
+            )
 
     def __command_config_position(
             self, src: CommandSource, ctx: CommandContext
@@ -851,14 +935,13 @@ class CommandHandler:
         position = ctx['position']
         try:
             bot = self.__plugin.bot_manager.get_bot(name)
-            location = bot.location
-            location.position = position
+            location = bot.location.with_position(position)
             bot.set_location(location)
-            self.__plugin.bot_manager.save_data()
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'position',
-                    location.rounded_position
+                    location.display_position
                 )
             )
         except BotNotExistsException as e:
@@ -869,14 +952,13 @@ class CommandHandler:
         facing = ctx['facing']
         try:
             bot = self.__plugin.bot_manager.get_bot(name)
-            location = bot.location
-            location.facing = facing
+            location = bot.location.with_facing(facing)
             bot.set_location(location)
-            self.__plugin.bot_manager.save_data()
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'facing',
-                    location.rounded_facing
+                    location.display_facing
                 )
             )
         except BotNotExistsException as e:
@@ -889,15 +971,16 @@ class CommandHandler:
         dimension = ctx['dimension']
         try:
             bot = self.__plugin.bot_manager.get_bot(name)
-            location = bot.location
-            location.dimension = DIMENSION.INT_TRANSLATION.get(dimension)
+            location = bot.location.with_dimension(
+                DIMENSION.INT_TRANSLATION.get(dimension)
+            )
 
             # Check dimension
             if location.dimension is None:
                 raise IllegalDimensionException(dimension)
 
             bot.set_location(location)
-            self.__plugin.bot_manager.save_data()
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'dimension',
@@ -919,8 +1002,9 @@ class CommandHandler:
         try:
             if comment.startswith('"') and comment.endswith('"'):
                 comment = comment[1:-1]
-            self.__plugin.bot_manager.get_bot(name).set_comment(comment)
-            self.__plugin.bot_manager.save_data()
+            bot = self.__plugin.bot_manager.get_bot(name)
+            bot.set_comment(comment)
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'comment', comment
@@ -939,7 +1023,7 @@ class CommandHandler:
             actions = bot.actions
             actions.append(action)
             bot.set_actions(actions)
-            self.__plugin.bot_manager.save_data()
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'actions', actions
@@ -963,7 +1047,7 @@ class CommandHandler:
 
             actions.insert(index, action)
             bot.set_actions(actions)
-            self.__plugin.bot_manager.save_data()
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'actions', actions
@@ -990,7 +1074,7 @@ class CommandHandler:
 
             actions.pop(index)
             bot.set_actions(actions)
-            self.__plugin.bot_manager.save_data()
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'actions', actions
@@ -1018,7 +1102,7 @@ class CommandHandler:
 
             actions[index] = action
             bot.set_actions(actions)
-            self.__plugin.bot_manager.save_data()
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'actions', actions
@@ -1036,8 +1120,9 @@ class CommandHandler:
     ):
         name = self.__plugin.parse_name(ctx['name'])
         try:
-            self.__plugin.bot_manager.get_bot(name).set_actions([])
-            self.__plugin.bot_manager.save_data()
+            bot = self.__plugin.bot_manager.get_bot(name)
+            bot.set_actions([])
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'actions', []
@@ -1056,7 +1141,7 @@ class CommandHandler:
             tags = bot.tags
             tags.append(tag)
             bot.set_tags(tags)
-            self.__plugin.bot_manager.save_data()
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'tags', tags
@@ -1080,7 +1165,7 @@ class CommandHandler:
 
             tags.insert(index, tag)
             bot.set_tags(tags)
-            self.__plugin.bot_manager.save_data()
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'tags', tags
@@ -1107,7 +1192,7 @@ class CommandHandler:
 
             tags.pop(index)
             bot.set_tags(tags)
-            self.__plugin.bot_manager.save_data()
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'tags', tags
@@ -1135,7 +1220,7 @@ class CommandHandler:
 
             tags[index] = tag
             bot.set_tags(tags)
-            self.__plugin.bot_manager.save_data()
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'tags', tags
@@ -1153,8 +1238,9 @@ class CommandHandler:
     ):
         name = self.__plugin.parse_name(ctx['name'])
         try:
-            self.__plugin.bot_manager.get_bot(name).set_tags([])
-            self.__plugin.bot_manager.save_data()
+            bot = self.__plugin.bot_manager.get_bot(name)
+            bot.set_tags([])
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'tags', []
@@ -1169,8 +1255,9 @@ class CommandHandler:
         name = self.__plugin.parse_name(ctx['name'])
         auto_login = ctx['autoLogin']
         try:
-            self.__plugin.bot_manager.get_bot(name).set_auto_login(auto_login)
-            self.__plugin.bot_manager.save_data()
+            bot = self.__plugin.bot_manager.get_bot(name)
+            bot.set_auto_login(auto_login)
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'autoLogin', auto_login
@@ -1185,10 +1272,9 @@ class CommandHandler:
         name = self.__plugin.parse_name(ctx['name'])
         auto_run_actions = ctx['autoRunActions']
         try:
-            self.__plugin.bot_manager.get_bot(name).set_auto_run_actions(
-                auto_run_actions
-            )
-            self.__plugin.bot_manager.save_data()
+            bot = self.__plugin.bot_manager.get_bot(name)
+            bot.set_auto_run_actions(auto_run_actions)
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'autoRunActions',
@@ -1204,10 +1290,9 @@ class CommandHandler:
         name = self.__plugin.parse_name(ctx['name'])
         auto_update = ctx['autoUpdate']
         try:
-            self.__plugin.bot_manager.get_bot(name).set_auto_update(
-                auto_update
-            )
-            self.__plugin.bot_manager.save_data()
+            bot = self.__plugin.bot_manager.get_bot(name)
+            bot.set_auto_update(auto_update)
+            self.__plugin.bot_manager.save_data(bot)
             src.reply(
                 RTextMCDRTranslation(
                     'bot.command.config', name, 'autoUpdate',
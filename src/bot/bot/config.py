@@ -9,6 +9,15 @@ class Config(Serializable):
     name_prefix: str = 'bot_'
     name_suffix: str = ''
     post_join_delay: int = 0
+    spawn_batch_size: int = 10
+    spawn_batch_interval: float = 1.0
+    spawn_join_timeout: float = 10.0
+    save_delay: float = 1.0
+    bin_max_records: int = 1000
+    location_fetch_limit: int = 8
+    event_queue_size: int = 100
+    action_commands_per_tick: int = 10
+    worker_pool_size: int = 4
     permissions: Dict[str, int] = {
         'list': 1,
         'spawn': 1,
@@ -18,5 +27,6 @@ class Config(Serializable):
         'info': 1,
         'save': 2,
         'del': 2,
+        'restore': 2,
         'config': 2
     }
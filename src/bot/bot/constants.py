@@ -1,6 +1,10 @@
 CONFIG_FILE_NAME = 'config.json'
 DATA_FILE_NAME = 'botList.json'
-BIN_FILE_NAME = 'botBin.json'
+BIN_FILE_NAME = 'botBin.jsonl'
+LEGACY_BIN_FILE_NAME = 'botBin.json'
+
+# bump when the in-memory state handed over on reload changes
+STATE_VERSION = 1
 
 
 class DIMENSION:
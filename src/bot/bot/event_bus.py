@@ -0,0 +1,85 @@
+import time
+import threading
+import contextlib
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List
+
+if TYPE_CHECKING:
+    from bot.bot import Bot
+    from bot.plugin import Plugin
+
+BotEvent = Dict[str, Any]
+Subscriber = Callable[[BotEvent], None]
+
+
+class EventBus:
+    """
+    Publish state changes of bots to subscribers.
+    Subscribers are called on the thread that changed the bot, so they must
+    return quickly and never block.
+    """
+
+    def __init__(self, plugin: 'Plugin'):
+        self.__plugin: 'Plugin' = plugin
+        self.__lock = threading.Lock()
+        self.__subscribers: List[Subscriber] = []
+        self.__local = threading.local()
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        """
+        Subscribe bot events.
+        :param subscriber: A callable accepting an event dict.
+        """
+        with self.__lock:
+            self.__subscribers = [*self.__subscribers, subscriber]
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """
+        Unsubscribe bot events.
+        :param subscriber: The subscribed callable.
+        """
+        with self.__lock:
+            self.__subscribers = [
+                i for i in self.__subscribers if i != subscriber
+            ]
+
+    @contextlib.contextmanager
+    def muted(self) -> Iterator[None]:
+        """
+        Drop events published by the current thread in the block, such as
+        bots created while loading.
+        """
+        self.__local.muted = getattr(self.__local, 'muted', 0) + 1
+        try:
+            yield
+        finally:
+            self.__local.muted -= 1
+
+    def publish(self, event_type: str, bot: 'Bot', **data: Any) -> None:
+        """
+        Publish an event of a bot.
+        :param event_type: Type of the event, such as spawn, join, left,
+            kill, save, delete or config.
+        :param bot: Bot.
+        :param data: Extra data of the event.
+        """
+        # copy on write, iterating without lock
+        subscribers = self.__subscribers
+        if len(subscribers) == 0 or getattr(self.__local, 'muted', 0) > 0:
+            return
+
+        event = {
+            'type': event_type,
+            'name': bot.name,
+            'online': bot.online,
+            'saved': bot.saved,
+            'version': bot.version,
+            'time': time.time(),
+            **data
+        }
+        for subscriber in subscribers:
+            try:
+                subscriber(event)
+            except Exception:
+                self.__plugin.server.logger.exception(
+                    f'Error occurred while publishing bot event {event}'
+                )
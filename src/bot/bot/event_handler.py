@@ -3,13 +3,19 @@ from typing import TYPE_CHECKING
 
 from mcdreforged.api.event import MCDRPluginEvents
 from mcdreforged.api.types import PluginServerInterface, Info
-from mcdreforged.api.decorator import event_listener, new_thread
+from mcdreforged.api.decorator import event_listener
 from mcdreforged.minecraft.rtext.style import RColor
 from mcdreforged.minecraft.rtext.text import RText, RTextList
 
+from bot.join_worker import JoinWorker
+
 if TYPE_CHECKING:
     from bot.plugin import Plugin
 
+BOT_JOINED_PATTERN = re.compile(
+    r'\w+\[local] logged in with entity id \d+ at \(.*\)'
+)
+
 plugin: 'Plugin'
 
 
@@ -18,56 +24,96 @@ class EventHandler:
         global plugin
         plugin = plg
 
+        self.__join_worker = JoinWorker(plg)
+        self.__joined_handled = 0
+        self.__joined_skipped = 0
+
+    @property
+    def join_worker(self) -> JoinWorker:
+        return self.__join_worker
+
+    @property
+    def joined_handled(self) -> int:
+        """
+        Number of player joined events handled as bot joins.
+        """
+        return self.__joined_handled
+
+    @property
+    def joined_skipped(self) -> int:
+        """
+        Number of player joined events skipped as real players.
+        """
+        return self.__joined_skipped
+
+    def count_joined(self, handled: bool) -> None:
+        """
+        Count a player joined event.
+        :param handled: A bool, handled as a bot join or skipped.
+        """
+        if handled:
+            self.__joined_handled += 1
+        else:
+            self.__joined_skipped += 1
+
+    def unload(self) -> None:
+        """
+        Stop the join worker.
+        """
+        self.__join_worker.stop()
+
     @staticmethod
     @event_listener(MCDRPluginEvents.SERVER_STARTUP)
     def on_server_startup(server: PluginServerInterface):
-        for bot in plugin.bot_manager.bots.values():
-            if bot.auto_login:
-                bot.spawn()
+        plugin.bot_manager.spawn_scheduler.schedule(
+            bot for bot in plugin.bot_manager.bots.values()
+            if bot.auto_login
+        )
 
     @staticmethod
     @event_listener(MCDRPluginEvents.SERVER_STOP)
     def on_server_stop(server: PluginServerInterface, server_return_code: int):
+        plugin.bot_manager.spawn_scheduler.clear()
+        plugin.bot_manager.action_scheduler.clear()
         for bot in plugin.bot_manager.bots.values():
             if bot.online:
                 bot.set_online(False)
         plugin.bot_manager.update_list()
+        plugin.bot_manager.flush_data()
 
     @staticmethod
     @event_listener(MCDRPluginEvents.PLAYER_JOINED)
-    @new_thread('Bot joined')
     def on_player_joined(
             server: PluginServerInterface,
             player: str,
             info: Info
     ):
-        if re.fullmatch(
-                r'\w+\[local] logged in with entity id \d+ at \(.*\)',
-                info.content
+        # cheap prefilter before matching, real players are skipped
+        if (
+                '[local]' not in info.content or
+                BOT_JOINED_PATTERN.fullmatch(info.content) is None
         ):
-            # parse name
-            name = plugin.parse_name(player)
-            if name != player.lower():
-                message = RText(
-                    f'Warning: Bot "{player}" is not named correctly, '
-                    f'it is suggested to use "{name}" as the name',
-                    color=RColor.yellow
-                )
-                server.logger.warning(message)
-                server.say(message)
-
-            # debug log
-            server.logger.debug(f'Bot {player} joined')
-
-            # To Bot instance
-            if plugin.bot_manager.is_in_list(name):
-                bot = plugin.bot_manager.get_bot(name)
-            else:
-                location = plugin.get_location(player)
-                bot = plugin.bot_manager.new_bot(name, location)
-
-            # Spawned handler
-            bot.spawned(player)
+            plugin.event_handler.count_joined(False)
+            return
+        plugin.event_handler.count_joined(True)
+
+        # parse name
+        name = plugin.parse_name(player)
+        plugin.bot_manager.spawn_scheduler.joined(name)
+        if name != player.lower():
+            message = RText(
+                f'Warning: Bot "{player}" is not named correctly, '
+                f'it is suggested to use "{name}" as the name',
+                color=RColor.yellow
+            )
+            server.logger.warning(message)
+            server.say(message)
+
+        # debug log
+        server.logger.debug(f'Bot {player} joined')
+
+        # handle in join worker
+        plugin.event_handler.join_worker.submit(player)
 
     @staticmethod
     @event_listener(MCDRPluginEvents.PLAYER_LEFT)
@@ -78,10 +124,17 @@ class EventHandler:
         # remove from list
         if plugin.bot_manager.is_in_list(name):
             server.logger.debug(f'Bot {name} left')
-            plugin.bot_manager.get_bot(name).set_online(False)
+            bot = plugin.bot_manager.get_bot(name)
+            bot.set_online(False)
+            plugin.bot_manager.action_scheduler.cancel(bot)
+            plugin.event_bus.publish('left', bot)
             plugin.bot_manager.update_list()
 
     @staticmethod
     @event_listener(MCDRPluginEvents.PLUGIN_UNLOADED)
     def on_unload(server: PluginServerInterface):
         plugin.unload_fastapi_manager()
+        plugin.event_handler.unload()
+        plugin.bot_manager.unload()
+        plugin.executor.shutdown()
+        plugin.location_executor.shutdown()
@@ -0,0 +1,81 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from bot.plugin import Plugin
+
+
+class Executor:
+    """
+    Shared bounded thread pool for blocking work, such as data API queries,
+    so bursts of commands never create a thread per call.
+    """
+
+    def __init__(
+            self,
+            plugin: 'Plugin',
+            max_workers: int,
+            thread_name_prefix: str = 'Bot-Worker'
+    ):
+        self.__plugin: 'Plugin' = plugin
+        self.__max_workers = max(max_workers, 1)
+        self.__lock = threading.Lock()
+        self.__queue_depth = 0
+        self.__executor = ThreadPoolExecutor(
+            max_workers=self.__max_workers,
+            thread_name_prefix=thread_name_prefix
+        )
+
+    @property
+    def max_workers(self) -> int:
+        return self.__max_workers
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Number of submitted tasks waiting for a worker.
+        """
+        return self.__queue_depth
+
+    def submit(self, func: Callable, *args: Any, **kwargs: Any) -> Future:
+        """
+        Run a function in the pool, exceptions are logged.
+        :param func: Function.
+        :param args: Positional arguments of the function.
+        :param kwargs: Keyword arguments of the function.
+        :return: A Future of the result.
+        """
+        with self.__lock:
+            self.__queue_depth += 1
+        try:
+            future = self.__executor.submit(self.__run, func, args, kwargs)
+        except RuntimeError:
+            with self.__lock:
+                self.__queue_depth -= 1
+            raise
+        future.add_done_callback(self.__on_done)
+        return future
+
+    def shutdown(self) -> None:
+        """
+        Drop waiting tasks and stop the pool without waiting running tasks.
+        """
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def __on_done(self, future: Future) -> None:
+        # cancelled tasks never reach __run
+        if future.cancelled():
+            with self.__lock:
+                self.__queue_depth -= 1
+
+    def __run(self, func: Callable, args: tuple, kwargs: dict) -> Any:
+        with self.__lock:
+            self.__queue_depth -= 1
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            self.__plugin.server.logger.exception(
+                f'Error occurred while running {func.__name__}'
+            )
+            raise
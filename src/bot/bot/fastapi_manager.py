@@ -1,6 +1,14 @@
-from typing import TYPE_CHECKING, List
-
-from fastapi import FastAPI, HTTPException
+import json
+import bisect
+import asyncio
+import hashlib
+import weakref
+import threading
+from uuid import uuid4
+from typing import TYPE_CHECKING, Dict, List, Literal, Tuple
+
+from fastapi import FastAPI, HTTPException, Header, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, conlist
 from mcdreforged.api.types import PluginServerInterface
 
@@ -41,6 +49,7 @@ class BaseBotRequest(BaseModel):
     autoRunActions: bool | None = None
     autoUpdate: bool | None = None
     online: bool | None = None
+    runActions: bool | None = None
 
 
 class PostBotRequest(BaseBotRequest):
@@ -54,6 +63,30 @@ class PatchBotRequest(BaseBotRequest):
 
 class BotsGetResponse(BaseModel):
     bots: List[BotModel]
+    nextCursor: str | None = None
+
+
+class BatchOperation(BaseModel):
+    op: Literal['create', 'patch', 'delete', 'spawn', 'kill']
+    name: str
+    bot: BaseBotRequest | None = None
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
+
+class BatchResult(BaseModel):
+    op: str
+    name: str
+    success: bool
+    detail: str | None = None
+    bot: BotModel | None = None
+
+
+class BatchResponse(BaseModel):
+    applied: bool
+    results: List[BatchResult]
 
 
 def to_bot_model(bot: Bot) -> BotModel:
@@ -75,9 +108,51 @@ def to_bot_model(bot: Bot) -> BotModel:
     )
 
 
+class EventStreamClient:
+    """
+    A client of the event stream with a bounded queue.
+    Events are dropped instead of blocking when the queue is full.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, size: int):
+        self.loop = loop
+        # None closes the stream
+        self.queue: asyncio.Queue[str | None] = asyncio.Queue(
+            maxsize=max(size, 1)
+        )
+        self.dropped = 0
+
+    def put(self, data: str) -> None:
+        """
+        Put an event, must be called in the event loop of the client.
+        :param data: Event data.
+        """
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """
+        End the stream, must be called in the event loop of the client.
+        """
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(None)
+
+
 class FastAPIManager:
     def __init__(self, plugin: 'Plugin'):
         self.__plugin: 'Plugin' = plugin
+        # bot versions restart on every load, keep etags of runs apart
+        self.__etag_salt = uuid4().hex
+        self.__bot_json_cache: weakref.WeakKeyDictionary[
+            Bot, Tuple[int, str]
+        ] = weakref.WeakKeyDictionary()
+        self.__stream_lock = threading.Lock()
+        self.__stream_clients: List[EventStreamClient] = []
+        self.__plugin.event_bus.subscribe(self.__on_bot_event)
 
         # check fast api ready
         if (
@@ -100,7 +175,62 @@ class FastAPIManager:
     def __bot_manager(self):
         return self.__plugin.bot_manager
 
-    def __update_bot_data(self, bot: Bot, request: BaseBotRequest) -> None:
+    def __on_bot_event(self, event: Dict) -> None:
+        """
+        Fan out a bot event to stream clients without blocking.
+        :param event: Event dict.
+        """
+        with self.__stream_lock:
+            clients = list(self.__stream_clients)
+        if len(clients) == 0:
+            return
+        data = json.dumps(event, ensure_ascii=False)
+        for client in clients:
+            try:
+                client.loop.call_soon_threadsafe(client.put, data)
+            except RuntimeError:
+                # loop closed
+                pass
+
+    async def __stream_events(self, client: EventStreamClient):
+        try:
+            while True:
+                try:
+                    data = await asyncio.wait_for(client.queue.get(), 15)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                if data is None:
+                    return
+                if client.dropped > 0:
+                    yield f'event: dropped\ndata: {client.dropped}\n\n'
+                    client.dropped = 0
+                yield f'data: {data}\n\n'
+        finally:
+            with self.__stream_lock:
+                self.__stream_clients.remove(client)
+
+    def __to_bot_json(self, bot: Bot) -> str:
+        """
+        Serialize a bot to JSON, cached until the version of the bot changes.
+        :param bot: Bot.
+        :return: JSON string of the BotModel.
+        """
+        # read version before data, a stale cache is never marked fresh
+        version = bot.version
+        cached = self.__bot_json_cache.get(bot)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        data = to_bot_model(bot).model_dump_json()
+        self.__bot_json_cache[bot] = (version, data)
+        return data
+
+    def __update_bot_data(
+            self,
+            bot: Bot,
+            request: BaseBotRequest,
+            save: bool = True
+    ) -> None:
         # spawn or kill checking
         if request.online is not None:
             if request.online and bot.online:
@@ -114,10 +244,29 @@ class FastAPIManager:
                     detail=f'Bot "{bot.name}" is not online.'
                 )
 
-        # name
+        # run actions checking
+        if request.runActions and (not bot.online or request.online is False):
+            raise HTTPException(
+                status_code=422,
+                detail=f'Bot "{bot.name}" is not online.'
+            )
+
+        # name checking
+        new_name = None
         if request.name is not None:
-            bot.set_name(self.__plugin.parse_name(request.name))
-            self.__plugin.bot_manager.update_list()
+            new_name = self.__plugin.parse_name(request.name)
+            if (
+                    new_name != bot.name and
+                    self.__plugin.bot_manager.is_in_list(new_name)
+            ):
+                raise HTTPException(
+                    status_code=422,
+                    detail=f'Bot "{new_name}" already exists.'
+                )
+
+        # name
+        if new_name is not None:
+            self.__plugin.bot_manager.rename(bot.name, new_name)
 
         # location
         if request.location is not None:
@@ -160,20 +309,245 @@ class FastAPIManager:
             elif not request.online and bot.online:
                 bot.kill()
 
+        # run actions
+        if request.runActions:
+            bot.run_actions()
+
         # save data
-        self.__plugin.bot_manager.save_data()
+        if save:
+            self.__plugin.bot_manager.save_data(bot)
+
+    def __check_batch(self, operations: List[BatchOperation]) -> List[str]:
+        """
+        Check all operations of a batch against a simulated state, nothing
+        is changed.
+        :param operations: Operations of the batch.
+        :return: A list of error details, empty string if no error.
+        """
+        # name -> (saved, online), None if not in the list
+        states: Dict[str, Tuple[bool, bool] | None] = {}
+
+        def get_state(bot_name: str) -> Tuple[bool, bool] | None:
+            if bot_name not in states:
+                if self.__bot_manager.is_in_list(bot_name):
+                    bot = self.__bot_manager.get_bot(bot_name)
+                    states[bot_name] = (bot.saved, bot.online)
+                else:
+                    states[bot_name] = None
+            return states[bot_name]
+
+        errors = []
+        for operation in operations:
+            name = self.__plugin.parse_name(operation.name)
+            request = operation.bot or BaseBotRequest()
+            state = get_state(name)
+            saved, online = state if state is not None else (False, False)
+            error = ''
+
+            if operation.op == 'create':
+                if saved:
+                    error = f'Bot "{name}" is already saved.'
+                elif request.location is None:
+                    error = 'Location is required.'
+                saved = True
+            elif state is None:
+                error = f'Bot "{name}" is not found.'
+            elif operation.op == 'patch':
+                if request == BaseBotRequest():
+                    error = 'No parameter is provided.'
+                elif request.name is not None:
+                    new_name = self.__plugin.parse_name(request.name)
+                    if new_name != name and get_state(new_name) is not None:
+                        error = f'Bot "{new_name}" already exists.'
+                    elif new_name != name:
+                        states[name] = None
+                        name = new_name
+            elif operation.op == 'delete':
+                if not saved:
+                    error = f'Bot "{name}" is not saved.'
+                saved = False
+            elif operation.op == 'spawn':
+                request = BaseBotRequest(online=True)
+            elif operation.op == 'kill':
+                request = BaseBotRequest(online=False)
+
+            # run actions
+            if error == '' and request.runActions and (
+                    not online or request.online is False
+            ):
+                error = f'Bot "{name}" is not online.'
+
+            # spawn or kill
+            if error == '' and request.online is not None:
+                if request.online and online:
+                    error = f'Bot "{name}" is already online.'
+                elif not request.online and not online:
+                    error = f'Bot "{name}" is not online.'
+                online = request.online
+
+            errors.append(error)
+            if error == '':
+                states[name] = (saved, online) if saved or online else None
+        return errors
+
+    def __apply_batch(
+            self,
+            operations: List[BatchOperation]
+    ) -> List[BatchResult]:
+        """
+        Apply checked operations in order, kills in a row are done together.
+        Stops at the first failure, applied operations are not rolled back.
+        :param operations: Operations of the batch.
+        :return: A list of results.
+        """
+        results: List[BatchResult] = []
+        kill_bots: List[Bot] = []
+        kill_results: List[BatchResult] = []
+
+        def flush_kills() -> bool:
+            if len(kill_bots) == 0:
+                return True
+            try:
+                self.__bot_manager.kill_bots(kill_bots)
+            except Exception as e:
+                self.__logger.exception(
+                    '[FastAPI] Failed to apply batch kill operations'
+                )
+                for kill_result in kill_results:
+                    kill_result.success = False
+                    kill_result.detail = str(e)
+                return False
+            else:
+                for killed_bot, kill_result in zip(kill_bots, kill_results):
+                    kill_result.bot = to_bot_model(killed_bot)
+                return True
+            finally:
+                kill_bots.clear()
+                kill_results.clear()
+
+        for operation in operations:
+            name = self.__plugin.parse_name(operation.name)
+            request = operation.bot or BaseBotRequest()
+            if operation.op != 'kill' and not flush_kills():
+                break
+            result = BatchResult(op=operation.op, name=name, success=True)
+            results.append(result)
+            try:
+                if operation.op == 'kill':
+                    kill_bots.append(self.__bot_manager.get_bot(name))
+                    kill_results.append(result)
+                    continue
+
+                # kill with other kills instead of a thread per bot
+                kill = request.online is False
+                if kill:
+                    request = request.model_copy(update={'online': None})
+
+                bot = None
+                if operation.op == 'create':
+                    bot = self.__bot_manager.save(
+                        name,
+                        location=Location(
+                            request.location.position,
+                            request.location.facing,
+                            request.location.dimension
+                        )
+                    )
+                    request = request.model_copy(update={'name': None})
+                    self.__update_bot_data(bot, request, save=False)
+                elif operation.op == 'patch':
+                    bot = self.__bot_manager.get_bot(name)
+                    self.__update_bot_data(bot, request, save=False)
+                    self.__bot_manager.save_data(bot)
+                elif operation.op == 'delete':
+                    bot = self.__bot_manager.delete(name)
+                elif operation.op == 'spawn':
+                    bot = self.__bot_manager.spawn(name)
+
+                if kill:
+                    kill_bots.append(bot)
+                    kill_results.append(result)
+                else:
+                    result.bot = to_bot_model(bot)
+            except Exception as e:
+                self.__logger.exception(
+                    f'[FastAPI] Failed to apply batch operation {operation}'
+                )
+                result.success = False
+                result.detail = str(e)
+                break
+        else:
+            flush_kills()
+
+        # later operations may depend on the failed one, skip them
+        for operation in operations[len(results):]:
+            results.append(BatchResult(
+                op=operation.op,
+                name=self.__plugin.parse_name(operation.name),
+                success=False,
+                detail='Not applied, a previous operation failed.'
+            ))
+        return results
 
     def __mount_app(self, server: PluginServerInterface):
         # create app
         app = FastAPI()
 
-        @app.get("/bots")
-        async def __get_bots() -> BotsGetResponse:
-            bots = [
-                to_bot_model(bot)
-                for bot in self.__bot_manager.bots.values()
-            ]
-            return BotsGetResponse(bots=bots)
+        @app.get("/bots", response_model=BotsGetResponse)
+        async def __get_bots(
+                limit: int | None = Query(default=None, ge=1),
+                cursor: str | None = None,
+                tag: str | None = None,
+                online: bool | None = None,
+                if_none_match: str | None = Header(default=None)
+        ) -> Response:
+            # bots sorted by name, cursor is the last name of previous page
+            bots = self.__bot_manager.query(tag, online)
+            if cursor is not None:
+                names = [bot.name for bot in bots]
+                bots = bots[bisect.bisect_right(names, cursor):]
+            next_cursor = None
+            if limit is not None and len(bots) > limit:
+                bots = bots[:limit]
+                next_cursor = bots[-1].name
+
+            # etag from versions, unchanged pages are not serialized
+            etag = 'W/"{}"'.format(hashlib.sha1(repr((
+                self.__etag_salt,
+                [(bot.name, bot.version) for bot in bots],
+                next_cursor
+            )).encode('utf-8')).hexdigest())
+            if if_none_match is not None and (
+                    if_none_match.strip() == '*' or
+                    etag in [i.strip() for i in if_none_match.split(',')]
+            ):
+                return Response(status_code=304, headers={'ETag': etag})
+
+            # response
+            content = (
+                    '{"bots":[' +
+                    ','.join(self.__to_bot_json(bot) for bot in bots) +
+                    '],"nextCursor":' + json.dumps(next_cursor) + '}'
+            )
+            return Response(
+                content,
+                media_type='application/json',
+                headers={'ETag': etag}
+            )
+
+        @app.get("/events")
+        async def __get_events() -> StreamingResponse:
+            client = EventStreamClient(
+                asyncio.get_running_loop(),
+                self.__plugin.config.event_queue_size
+            )
+            with self.__stream_lock:
+                self.__stream_clients.append(client)
+            return StreamingResponse(
+                self.__stream_events(client),
+                media_type='text/event-stream',
+                headers={'Cache-Control': 'no-cache'}
+            )
 
         @app.post("/bots")
         async def __post_bots(request: PostBotRequest) -> BotModel:
@@ -208,6 +582,50 @@ class FastAPIManager:
                     detail=f'Bot "{name}" is already saved.'
                 )
 
+        @app.post("/bots:batch")
+        def __batch_bots(request: BatchRequest) -> BatchResponse:
+            # check all operations first, nothing is applied on a check error
+            errors = self.__check_batch(request.operations)
+            if any(errors):
+                response = BatchResponse(
+                    applied=False,
+                    results=[
+                        BatchResult(
+                            op=operation.op,
+                            name=self.__plugin.parse_name(operation.name),
+                            success=False,
+                            detail=error or None
+                        )
+                        for operation, error in zip(
+                            request.operations, errors
+                        )
+                    ]
+                )
+                return JSONResponse(
+                    status_code=422,
+                    content=response.model_dump()
+                )
+
+            # apply and write once
+            with self.__bot_manager.batch():
+                results = self.__apply_batch(request.operations)
+
+            # failed while applying, operations before are kept
+            if not all(result.success for result in results):
+                response = BatchResponse(applied=False, results=results)
+                return JSONResponse(
+                    status_code=500,
+                    content=response.model_dump()
+                )
+
+            # log
+            self.__logger.debug(
+                f'[FastAPI] Applied {len(results)} batch operations'
+            )
+
+            # return
+            return BatchResponse(applied=True, results=results)
+
         @app.patch("/bots/{bot_name}")
         async def __patch_bot(
                 bot_name: str,
@@ -226,7 +644,8 @@ class FastAPIManager:
                     request.autoLogin is None and
                     request.autoRunActions is None and
                     request.autoUpdate is None and
-                    request.online is None
+                    request.online is None and
+                    request.runActions is None
             ):
                 raise HTTPException(
                     status_code=422,
@@ -276,5 +695,16 @@ class FastAPIManager:
         self.__plugin.fastapi_mcdr.mount(self.__plugin.plugin_id, app)
 
     def unload(self):
+        self.__plugin.event_bus.unsubscribe(self.__on_bot_event)
+
+        # end open streams, or clients stay on the unloaded bus
+        with self.__stream_lock:
+            clients = list(self.__stream_clients)
+        for client in clients:
+            try:
+                client.loop.call_soon_threadsafe(client.close)
+            except RuntimeError:
+                # loop closed
+                pass
         if self.__plugin.fastapi_mcdr is not None:
             self.__plugin.fastapi_mcdr.unmount(self.__plugin.plugin_id)
@@ -0,0 +1,112 @@
+import time
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Deque, List, Tuple
+
+if TYPE_CHECKING:
+    from bot.bot import Bot
+    from bot.plugin import Plugin
+
+
+class JoinWorker:
+    """
+    Process bot joins on a single long-lived thread.
+    Joined bots are set online in arrival order, then set up after the post
+    join delay, so the delay of one bot never holds the others back.
+    """
+
+    def __init__(self, plugin: 'Plugin'):
+        self.__plugin: 'Plugin' = plugin
+        self.__condition = threading.Condition()
+        self.__joins: Deque[Tuple[str, float]] = deque()
+        self.__setups: Deque[Tuple['Bot', float]] = deque()
+        self.__stopped = False
+
+        self.__thread = threading.Thread(
+            target=self.__loop,
+            name='Bot-JoinWorker',
+            daemon=True
+        )
+        self.__thread.start()
+
+    @property
+    def queue_size(self) -> int:
+        return len(self.__joins) + len(self.__setups)
+
+    @property
+    def pending_players(self) -> List[str]:
+        """
+        Player names of queued joins and bots waiting to be set up.
+        """
+        with self.__condition:
+            return [
+                *(player for player, _ in self.__joins),
+                *(bot.mc_name for bot, _ in self.__setups)
+            ]
+
+    def submit(self, player: str) -> None:
+        """
+        Add a joined bot to the queue.
+        :param player: Player name of the bot.
+        """
+        with self.__condition:
+            self.__joins.append((player, time.monotonic()))
+            self.__condition.notify_all()
+
+    def stop(self) -> None:
+        """
+        Stop the worker thread, queued joins are dropped.
+        """
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+        self.__thread.join()
+
+    def __loop(self) -> None:
+        while True:
+            with self.__condition:
+                while True:
+                    if self.__stopped:
+                        return
+                    if len(self.__joins) > 0:
+                        player, joined_at = self.__joins.popleft()
+                        bot = None
+                        break
+                    if len(self.__setups) > 0:
+                        timeout = self.__setups[0][1] - time.monotonic()
+                        if timeout <= 0:
+                            bot, _ = self.__setups.popleft()
+                            break
+                        self.__condition.wait(timeout)
+                    else:
+                        self.__condition.wait()
+
+            try:
+                if bot is None:
+                    self.__join(player, joined_at)
+                elif bot.online:
+                    bot.setup()
+            except Exception:
+                self.__plugin.server.logger.exception(
+                    'Error occurred while processing bot join'
+                )
+
+    def __join(self, player: str, joined_at: float) -> None:
+        bot_manager = self.__plugin.bot_manager
+
+        # To Bot instance
+        name = self.__plugin.parse_name(player)
+        if bot_manager.is_in_list(name):
+            bot = bot_manager.get_bot(name)
+        else:
+            location = self.__plugin.get_location(player)
+            bot = bot_manager.new_bot(name, location)
+
+        # Spawned handler
+        bot.spawned(player)
+
+        # Set up after delay
+        with self.__condition:
+            self.__setups.append(
+                (bot, joined_at + self.__plugin.config.post_join_delay)
+            )
@@ -1,29 +1,114 @@
-from typing import List, Dict, Any
+from typing import Dict, Any, Iterable, Optional, Tuple
 
 import minecraft_data_api as api
 from mcdreforged.api.rtext import RText, RColor
 
 from bot.constants import DIMENSION
 
+# dimension id -> colored translation, shared by all locations
+_DIMENSION_TEXTS: Dict[int, RText] = {}
+
 
 class Location:
+    """
+    Immutable location of a bot.
+    Use with_position, with_facing and with_dimension to get a changed copy.
+    Derived views are computed on first access and kept.
+    """
+
+    __slots__ = (
+        '__position',
+        '__facing',
+        '__dimension',
+        '__rounded_position',
+        '__rounded_facing',
+        '__display_position',
+        '__display_facing',
+        '__command_position',
+        '__command_facing',
+    )
+
     def __init__(
             self,
-            position: List[float],
-            facing: List[float],
-            dimension: int
+            position: Iterable[float],
+            facing: Iterable[float],
+            dimension: Optional[int]
     ):
-        self.position = position
-        self.facing = facing
-        self.dimension = dimension
+        self.__position: Tuple[float, ...] = tuple(position)
+        self.__facing: Tuple[float, ...] = tuple(facing)
+        self.__dimension = dimension
+        self.__rounded_position = None
+        self.__rounded_facing = None
+        self.__display_position = None
+        self.__display_facing = None
+        self.__command_position = None
+        self.__command_facing = None
 
     @property
-    def rounded_position(self) -> List[float]:
-        return [round(i, 2) for i in self.position]
+    def position(self) -> Tuple[float, ...]:
+        return self.__position
 
     @property
-    def rounded_facing(self) -> List[float]:
-        return [round(i, 2) for i in self.facing]
+    def facing(self) -> Tuple[float, ...]:
+        return self.__facing
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return self.__dimension
+
+    @property
+    def rounded_position(self) -> Tuple[float, ...]:
+        if self.__rounded_position is None:
+            self.__rounded_position = tuple(
+                round(i, 2) for i in self.__position
+            )
+        return self.__rounded_position
+
+    @property
+    def rounded_facing(self) -> Tuple[float, ...]:
+        if self.__rounded_facing is None:
+            self.__rounded_facing = tuple(round(i, 2) for i in self.__facing)
+        return self.__rounded_facing
+
+    @property
+    def display_position(self) -> str:
+        """
+        Get rounded position string to display, such as [1.0, 2.0, 3.0].
+        :return: str.
+        """
+        if self.__display_position is None:
+            self.__display_position = str(list(self.rounded_position))
+        return self.__display_position
+
+    @property
+    def display_facing(self) -> str:
+        """
+        Get rounded facing string to display, such as [0.0, 0.0].
+        :return: str.
+        """
+        if self.__display_facing is None:
+            self.__display_facing = str(list(self.rounded_facing))
+        return self.__display_facing
+
+    @property
+    def command_position(self) -> str:
+        """
+        Get position string used in commands, such as 1.0 2.0 3.0.
+        :return: str.
+        """
+        if self.__command_position is None:
+            self.__command_position = ' '.join(map(str, self.__position))
+        return self.__command_position
+
+    @property
+    def command_facing(self) -> str:
+        """
+        Get facing string used in commands, such as 0.0 0.0.
+        :return: str.
+        """
+        if self.__command_facing is None:
+            self.__command_facing = ' '.join(map(str, self.__facing))
+        return self.__command_facing
 
     @property
     def str_dimension(self) -> str:
@@ -31,35 +116,78 @@ class Location:
         Get minecraft dimension string.
         :return: str.
         """
-        return DIMENSION.STR_TRANSLATION[self.dimension]
+        return DIMENSION.STR_TRANSLATION[self.__dimension]
 
     @property
     def display_dimension(self) -> RText:
         """
         Get dimension RText to display.
+        The RText is shared by all locations in the same dimension, do not
+        modify it.
         :return: RText.
         """
+        translation = _DIMENSION_TEXTS.get(self.__dimension)
+        if translation is not None:
+            return translation
+
         # get translation
-        translation: RText = api.get_dimension_translation_text(self.dimension)
+        translation = api.get_dimension_translation_text(self.__dimension)
 
         # set color
-        if self.dimension == DIMENSION.OVERWORLD:
+        if self.__dimension == DIMENSION.OVERWORLD:
             translation.set_color(RColor.green)
-        elif self.dimension == DIMENSION.THE_NETHER:
+        elif self.__dimension == DIMENSION.THE_NETHER:
             translation.set_color(RColor.dark_red)
-        elif self.dimension == DIMENSION.THE_END:
+        elif self.__dimension == DIMENSION.THE_END:
             translation.set_color(RColor.light_purple)
 
-        # return
+        # cache and return
+        _DIMENSION_TEXTS[self.__dimension] = translation
         return translation
 
+    def with_position(self, position: Iterable[float]) -> 'Location':
+        """
+        Get a copy with another position.
+        :param position: Position.
+        :return: A new Location.
+        """
+        return Location(position, self.__facing, self.__dimension)
+
+    def with_facing(self, facing: Iterable[float]) -> 'Location':
+        """
+        Get a copy with another facing.
+        :param facing: Facing.
+        :return: A new Location.
+        """
+        return Location(self.__position, facing, self.__dimension)
+
+    def with_dimension(self, dimension: Optional[int]) -> 'Location':
+        """
+        Get a copy with another dimension.
+        :param dimension: Dimension.
+        :return: A new Location.
+        """
+        return Location(self.__position, self.__facing, dimension)
+
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> 'Location':
         return Location(data['position'], data['facing'], data['dimension'])
 
+    def __eq__(self, other):
+        if not isinstance(other, Location):
+            return NotImplemented
+        return (
+                self.__position == other.__position and
+                self.__facing == other.__facing and
+                self.__dimension == other.__dimension
+        )
+
+    def __hash__(self):
+        return hash((self.__position, self.__facing, self.__dimension))
+
     def __str__(self):
         return self.__class__.__name__ + {
-            'position': self.position,
-            'facing': self.facing,
-            'dimension': self.dimension
+            'position': list(self.__position),
+            'facing': list(self.__facing),
+            'dimension': self.__dimension
         }.__str__()
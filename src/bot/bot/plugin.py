@@ -1,8 +1,12 @@
+from typing import Any, Dict, Iterable, Optional
+
 import minecraft_data_api
 from mcdreforged.api.types import PluginServerInterface
 
-from bot.constants import CONFIG_FILE_NAME, DIMENSION
+from bot.constants import CONFIG_FILE_NAME, DIMENSION, STATE_VERSION
 from bot.config import Config
+from bot.event_bus import EventBus
+from bot.executor import Executor
 from bot.bot_manager import BotManager
 from bot.command_handler import CommandHandler
 from bot.event_handler import EventHandler
@@ -28,12 +32,27 @@ class Plugin:
         )
         self.__check_config()
 
-        self.__bot_manager = BotManager(self, prev_module)
+        # hot reload, take over the in-memory state of the previous module
+        prev_state = self.__get_prev_state(prev_module)
+
+        self.__event_bus = EventBus(self)
+        self.__executor = Executor(self, self.__config.worker_pool_size)
+        # separate pool, location fetches are waited in the shared executor
+        self.__location_executor = Executor(
+            self,
+            self.__config.location_fetch_limit,
+            'Bot-LocationFetcher'
+        )
+        self.__bot_manager = BotManager(self, prev_module, prev_state)
         self.__fastapi_manager = None
         self.load_fastapi_manager()
         self.__command_handler = CommandHandler(self)
         self.__event_handler = EventHandler(self)
 
+        if prev_state is not None:
+            for player in prev_state['joins']:
+                self.__event_handler.join_worker.submit(player)
+
     @property
     def plugin_id(self):
         return self.__server.get_self_metadata().id
@@ -54,6 +73,18 @@ class Plugin:
     def config(self):
         return self.__config
 
+    @property
+    def event_bus(self):
+        return self.__event_bus
+
+    @property
+    def executor(self):
+        return self.__executor
+
+    @property
+    def location_executor(self):
+        return self.__location_executor
+
     @property
     def bot_manager(self):
         return self.__bot_manager
@@ -66,6 +97,45 @@ class Plugin:
     def command_handler(self):
         return self.__command_handler
 
+    @property
+    def event_handler(self):
+        return self.__event_handler
+
+    def __get_prev_state(self, prev_module) -> Optional[Dict[str, Any]]:
+        """
+        Get state of the previous module if it has the same state version.
+        :param prev_module: Previous module, None on cold start.
+        :return: State dict, or None to load from the file.
+        """
+        prev_plugin = getattr(prev_module, 'plugin', None)
+        if not hasattr(prev_plugin, 'export_state'):
+            return None
+        try:
+            state = prev_plugin.export_state()
+        except Exception:
+            self.__server.logger.exception(
+                'Failed to export state of the previous module'
+            )
+            return None
+        if state.get('version') != STATE_VERSION:
+            self.__server.logger.info(
+                f'State version changed ({state.get("version")} -> '
+                f'{STATE_VERSION}), loading from the file'
+            )
+            return None
+        return state
+
+    def export_state(self) -> Dict[str, Any]:
+        """
+        Export in-memory state as plain data for the module loaded next.
+        :return: A dict with version, bots, spawnQueue, actions and joins.
+        """
+        return {
+            'version': STATE_VERSION,
+            **self.__bot_manager.export_state(),
+            'joins': self.__event_handler.join_worker.pending_players
+        }
+
     def __check_config(self):
         # flag
         save_flag = False
@@ -137,3 +207,40 @@ class Plugin:
         info = api.get_player_info(name)
         dimension = DIMENSION.INT_TRANSLATION.get(info['Dimension'])
         return Location(info['Pos'], info['Rotation'], dimension)
+
+    def get_locations(self, names: Iterable[str]) -> Dict[str, Location]:
+        """
+        Get locations from players or bots concurrently.
+        Each name is queried once, and at most location_fetch_limit queries
+        are in flight at the same time across all callers.
+        :param names: Names of players or bots.
+        :return: A dict of name to Location, names failed to query are not
+            included.
+        """
+        names = list(dict.fromkeys(names))
+        futures = [
+            self.__location_executor.submit(self.__fetch_location, name)
+            for name in names
+        ]
+        locations = {}
+        for name, future in zip(names, futures):
+            location = future.result()
+            if location is not None:
+                locations[name] = location
+        return locations
+
+    def __fetch_location(self, name: str) -> Optional[Location]:
+        # one query for all fields, as get_location
+        try:
+            info = self.minecraft_data_api.get_player_info(name)
+        except Exception:
+            self.server.logger.exception(f'Failed to get location of {name}')
+            return None
+        if info is None:
+            self.server.logger.warning(f'Failed to get location of {name}')
+            return None
+        return Location(
+            info['Pos'],
+            info['Rotation'],
+            DIMENSION.INT_TRANSLATION.get(info['Dimension'])
+        )
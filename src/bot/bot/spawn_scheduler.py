@@ -0,0 +1,174 @@
+import time
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Dict, Iterable, List, Any
+
+from bot.exceptions import *
+
+if TYPE_CHECKING:
+    from bot.bot import Bot
+    from bot.plugin import Plugin
+
+
+class SpawnScheduler:
+    """
+    Queue bot spawns and release them in batches.
+    A batch is released only after every bot of the previous batch joined
+    or the join timeout was reached, so the console is never flooded.
+    """
+
+    def __init__(self, plugin: 'Plugin'):
+        self.__plugin: 'Plugin' = plugin
+        self.__condition = threading.Condition()
+        self.__queue: Deque['Bot'] = deque()
+        self.__pending: Dict[str, float] = {}
+        self.__joined: Dict[str, float] = {}
+        self.__last_batch: Dict[str, Any] = {}
+        self.__stopped = False
+
+        self.__thread = threading.Thread(
+            target=self.__loop,
+            name='Bot-SpawnScheduler',
+            daemon=True
+        )
+        self.__thread.start()
+
+    @property
+    def queue_size(self) -> int:
+        return len(self.__queue)
+
+    @property
+    def queued_bots(self) -> List['Bot']:
+        """
+        Bots waiting in the queue, not spawned yet.
+        """
+        with self.__condition:
+            return list(self.__queue)
+
+    @property
+    def last_batch(self) -> Dict[str, Any]:
+        """
+        Statistics of the last released batch.
+        :return: A dict with size, joined, duration, throughput and latency.
+        """
+        return self.__last_batch.copy()
+
+    def schedule(self, bots: Iterable['Bot']) -> int:
+        """
+        Add bots to the spawn queue, online or queued bots are ignored.
+        :param bots: Bots to spawn.
+        :return: Number of bots added to the queue.
+        """
+        counter = 0
+        with self.__condition:
+            queued = {bot.name for bot in self.__queue}
+            for bot in bots:
+                if (
+                        bot.online or
+                        bot.name in queued or
+                        bot.name in self.__pending
+                ):
+                    continue
+                self.__queue.append(bot)
+                queued.add(bot.name)
+                counter += 1
+            self.__condition.notify_all()
+        return counter
+
+    def joined(self, name: str) -> None:
+        """
+        Handler when a bot joined, releases the backpressure of its batch.
+        :param name: Name of the bot.
+        """
+        with self.__condition:
+            if name in self.__pending and name not in self.__joined:
+                self.__joined[name] = time.monotonic() - self.__pending[name]
+                self.__condition.notify_all()
+
+    def clear(self) -> None:
+        """
+        Drop all queued and pending spawns.
+        """
+        with self.__condition:
+            self.__queue.clear()
+            self.__pending.clear()
+            self.__joined.clear()
+            self.__condition.notify_all()
+
+    def stop(self) -> None:
+        """
+        Stop the scheduler thread.
+        """
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+        self.__thread.join()
+
+    def __loop(self) -> None:
+        while True:
+            # wait for bots
+            with self.__condition:
+                while not self.__stopped and len(self.__queue) == 0:
+                    self.__condition.wait()
+                if self.__stopped:
+                    return
+
+            # release a batch
+            self.__release_batch()
+
+            # batch window
+            with self.__condition:
+                self.__condition.wait_for(
+                    lambda: self.__stopped,
+                    self.__plugin.config.spawn_batch_interval
+                )
+
+    def __release_batch(self) -> None:
+        config = self.__plugin.config
+        start = time.monotonic()
+
+        # spawn
+        with self.__condition:
+            size = max(config.spawn_batch_size, 1)
+            while len(self.__queue) > 0 and len(self.__pending) < size:
+                bot = self.__queue.popleft()
+                try:
+                    bot.spawn()
+                    self.__pending[bot.name] = time.monotonic()
+                except BotOnlineException:
+                    pass
+                except Exception:
+                    self.__plugin.server.logger.exception(
+                        f'Failed to spawn bot {bot.name}'
+                    )
+            batch_size = len(self.__pending)
+
+            # backpressure, wait for the batch to join
+            self.__condition.wait_for(
+                lambda: (
+                        self.__stopped or
+                        len(self.__joined) >= len(self.__pending)
+                ),
+                config.spawn_join_timeout
+            )
+            latencies = list(self.__joined.values())
+            self.__pending.clear()
+            self.__joined.clear()
+
+        # statistics
+        duration = time.monotonic() - start
+        self.__last_batch = {
+            'size': batch_size,
+            'joined': len(latencies),
+            'duration': duration,
+            'throughput': len(latencies) / duration if duration > 0 else 0.0,
+            'latency': (
+                sum(latencies) / len(latencies)
+                if len(latencies) > 0 else None
+            )
+        }
+        self.__plugin.server.logger.debug(
+            'Spawn batch released: {size} bots, {joined} joined in '
+            '{duration:.2f}s ({throughput:.2f} bots/s), '
+            'average latency {latency}'.format(**self.__last_batch)
+        )
@@ -0,0 +1,338 @@
+import os
+import json
+import time
+import textwrap
+import threading
+import contextlib
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from bot.bot import Bot
+    from bot.plugin import Plugin
+
+
+def write_atomic(path: str, content: str) -> None:
+    """
+    Write a file through a temporary file and rename it to the target,
+    so the file is never left half written.
+    :param path: Path of the file.
+    :param content: Content to write.
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class DataStorage:
+    """
+    Write-behind storage of saved bots.
+    Mutations only mark bots dirty, a flusher thread serializes dirty bots
+    and rewrites the file once per save delay window.
+    """
+
+    def __init__(self, plugin: 'Plugin', file_name: str):
+        self.__plugin: 'Plugin' = plugin
+        self.__path = os.path.join(
+            plugin.server.get_data_folder(),
+            file_name
+        )
+        self.__condition = threading.Condition()
+        self.__records: Dict['Bot', str] = {}
+        self.__dirty: Dict['Bot', None] = {}
+        self.__deadline: Optional[float] = None
+        self.__batch_depth = 0
+        self.__stopped = False
+        self.__write_count = 0
+        self.__write_bytes = 0
+
+        self.__thread = threading.Thread(
+            target=self.__loop,
+            name='Bot-DataStorage',
+            daemon=True
+        )
+        self.__thread.start()
+
+    @property
+    def write_count(self) -> int:
+        return self.__write_count
+
+    @property
+    def write_bytes(self) -> int:
+        return self.__write_bytes
+
+    def reset(self, bots: Iterable['Bot']) -> None:
+        """
+        Reset cached records to bots loaded from the file without writing.
+        :param bots: Saved bots.
+        """
+        with self.__condition:
+            self.__records = {
+                bot: self.__serialize(bot)
+                for bot in bots
+                if bot.saved
+            }
+            self.__dirty.clear()
+            self.__deadline = None
+
+    def mark_dirty(self, bots: Iterable['Bot']) -> None:
+        """
+        Mark bots to be written in the next flush.
+        :param bots: Bots changed, saved or deleted.
+        """
+        with self.__condition:
+            for bot in bots:
+                self.__dirty[bot] = None
+            if self.__batch_depth > 0:
+                return
+            if self.__plugin.config.save_delay <= 0:
+                self.__flush()
+            elif self.__deadline is None:
+                self.__deadline = (
+                        time.monotonic() + self.__plugin.config.save_delay
+                )
+                self.__condition.notify_all()
+
+    def remove(self, bots: Iterable['Bot']) -> None:
+        """
+        Forget bots no longer in the manager, they are dropped from the file
+        in the next flush.
+        :param bots: Removed bots.
+        """
+        with self.__condition:
+            changed = False
+            for bot in bots:
+                self.__dirty.pop(bot, None)
+                if self.__records.pop(bot, None) is not None:
+                    changed = True
+            if changed:
+                self.mark_dirty([])
+
+    def mark_all_dirty(self, bots: Iterable['Bot']) -> None:
+        """
+        Mark bots and all recorded bots to be written in the next flush.
+        :param bots: All bots of the manager.
+        """
+        with self.__condition:
+            self.mark_dirty([*bots, *self.__records.keys()])
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Hold writes until the block exits, then write all changes once.
+        """
+        with self.__condition:
+            self.__batch_depth += 1
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__batch_depth -= 1
+                if self.__batch_depth == 0:
+                    self.__flush()
+
+    def flush(self) -> None:
+        """
+        Write dirty bots now.
+        """
+        with self.__condition:
+            self.__flush()
+
+    def stop(self) -> None:
+        """
+        Flush and stop the flusher thread.
+        """
+        with self.__condition:
+            self.__flush()
+            self.__stopped = True
+            self.__condition.notify_all()
+        self.__thread.join()
+
+    @staticmethod
+    def __serialize(bot: 'Bot') -> str:
+        return textwrap.indent(
+            json.dumps(bot.saving_data, indent=4, ensure_ascii=False),
+            ' ' * 8
+        )
+
+    def __flush(self) -> None:
+        self.__deadline = None
+        if len(self.__dirty) == 0:
+            return
+
+        # update records of dirty bots
+        for bot in self.__dirty:
+            if bot.saved:
+                self.__records[bot] = self.__serialize(bot)
+            else:
+                self.__records.pop(bot, None)
+        self.__dirty.clear()
+
+        # write, same format as save_config_simple
+        if len(self.__records) == 0:
+            content = '{\n    "botList": []\n}'
+        else:
+            content = (
+                    '{\n    "botList": [\n' +
+                    ',\n'.join(self.__records.values()) +
+                    '\n    ]\n}'
+            )
+        try:
+            write_atomic(self.__path, content)
+            self.__write_count += 1
+            self.__write_bytes += len(content.encode('utf-8'))
+        except OSError:
+            self.__plugin.server.logger.exception(
+                f'Failed to write {self.__path}'
+            )
+
+    def __loop(self) -> None:
+        with self.__condition:
+            while not self.__stopped:
+                if self.__deadline is None:
+                    self.__condition.wait()
+                    continue
+                timeout = self.__deadline - time.monotonic()
+                if timeout > 0:
+                    self.__condition.wait(timeout)
+                elif self.__batch_depth > 0:
+                    # written when the batch exits
+                    self.__deadline = None
+                else:
+                    self.__flush()
+
+
+class BinStorage:
+    """
+    Recycle bin of deleted bots, stored as an append-only JSON lines journal.
+    Deleting appends one line, the journal is compacted to the retention
+    limit once it grows to twice the limit.
+    """
+
+    def __init__(
+            self,
+            plugin: 'Plugin',
+            file_name: str,
+            legacy_file_name: str
+    ):
+        self.__plugin: 'Plugin' = plugin
+        self.__path = os.path.join(
+            plugin.server.get_data_folder(),
+            file_name
+        )
+        self.__legacy_path = os.path.join(
+            plugin.server.get_data_folder(),
+            legacy_file_name
+        )
+        self.__lock = threading.Lock()
+
+        with self.__lock:
+            self.__migrate()
+            records = self.__read()
+            self.__count = len(records)
+            if 0 < self.__plugin.config.bin_max_records < self.__count:
+                self.__compact(records)
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    def append(self, data: Dict[str, Any]) -> None:
+        """
+        Append a deleted bot to the journal.
+        :param data: Saving data of the bot.
+        """
+        line = json.dumps(data, ensure_ascii=False) + '\n'
+        with self.__lock:
+            with open(self.__path, 'a', encoding='utf-8') as f:
+                f.write(line)
+            self.__count += 1
+            limit = self.__plugin.config.bin_max_records
+            if 0 < limit and self.__count >= limit * 2:
+                self.__compact(self.__read())
+
+    def records(self) -> List[Dict[str, Any]]:
+        """
+        Get all records in the bin, the oldest first.
+        :return: A list of saving data with deleted time.
+        """
+        with self.__lock:
+            return self.__read()
+
+    def pop(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Remove the latest record of a bot from the bin.
+        :param name: Name of the bot.
+        :return: The record, None if the bot is not in the bin.
+        """
+        with self.__lock:
+            records = self.__read()
+            for index in range(len(records) - 1, -1, -1):
+                if records[index].get('name') == name:
+                    record = records.pop(index)
+                    self.__compact(records)
+                    return record
+            return None
+
+    def compact(self) -> None:
+        """
+        Drop records over the retention limit.
+        """
+        with self.__lock:
+            self.__compact(self.__read())
+
+    def __read(self) -> List[Dict[str, Any]]:
+        if not os.path.isfile(self.__path):
+            return []
+        records = []
+        with open(self.__path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip() == '':
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    self.__plugin.server.logger.warning(
+                        f'Skipped broken line in {self.__path}'
+                    )
+        return records
+
+    def __compact(self, records: List[Dict[str, Any]]) -> None:
+        limit = self.__plugin.config.bin_max_records
+        if limit > 0:
+            records = records[-limit:]
+        write_atomic(
+            self.__path,
+            ''.join(
+                json.dumps(i, ensure_ascii=False) + '\n'
+                for i in records
+            )
+        )
+        self.__count = len(records)
+
+    def __migrate(self) -> None:
+        """
+        Move records from the old botBin.json to the journal.
+        """
+        if not os.path.isfile(self.__legacy_path):
+            return
+        try:
+            with open(self.__legacy_path, 'r', encoding='utf-8') as f:
+                legacy_records = json.load(f).get('botList', [])
+        except (OSError, ValueError, AttributeError):
+            # broken or partly written, keep it aside and skip it
+            self.__plugin.server.logger.exception(
+                f'Failed to read {self.__legacy_path}, moved to '
+                f'{self.__legacy_path}.bak and skipped'
+            )
+            with contextlib.suppress(OSError):
+                os.replace(self.__legacy_path, self.__legacy_path + '.bak')
+            return
+        self.__compact(legacy_records + self.__read())
+        os.replace(self.__legacy_path, self.__legacy_path + '.bak')
+        self.__plugin.server.logger.info(
+            f'Migrated {len(legacy_records)} records from '
+            f'{self.__legacy_path} to {self.__path}'
+        )
@@ -5,28 +5,55 @@ import json
 import time
 import typing
 import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from math import ceil, floor
 from dataclasses import dataclass
-from typing import Optional, Any, Text, Set, List, Callable
+from typing import Optional, Any, Dict, Text, Set, List, Callable, \
+    NamedTuple, Tuple
 
 from mcdreforged.api.types import PluginServerInterface, CommandSource, \
     PlayerCommandSource
 from mcdreforged.api.command import *
-from mcdreforged.api.decorator import new_thread
 from mcdreforged.api.utils import Serializable
 
 
 class LoopManager:
-    def __init__(self, run_function: Callable, interval: int):
+    """
+    Run a function repeatedly in a thread.
+    The function returns seconds to wait before the next run, at most
+    max_interval, or None to wait until woken up.
+    """
+
+    def __init__(
+            self,
+            run_function: Callable[[], Optional[float]],
+            max_interval: float
+    ):
         self.run_function = run_function
-        self.interval = interval
+        self.max_interval = max_interval
         self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
         self.thread = None
 
+        # statistics in seconds
+        self.cycles = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+
     def start(self):
         def loop():
-            while not self._stop_event.wait(self.interval):
-                self.run_function()
+            while not self._stop_event.is_set():
+                start = time.monotonic()
+                delay = self.run_function()
+                self.last_duration = time.monotonic() - start
+                self.max_duration = max(self.max_duration, self.last_duration)
+                self.cycles += 1
+
+                if delay is not None:
+                    delay = min(max(delay, 0), self.max_interval)
+                self._wake_event.wait(delay)
+                self._wake_event.clear()
 
         # If a thread is already running, stop it before starting a new one
         if self.thread is not None and self.thread.is_alive():
@@ -38,12 +65,122 @@ class LoopManager:
         )
         self.thread.start()
 
+    def wake(self):
+        """
+        Run the function now if the loop is waiting.
+        """
+        self._wake_event.set()
+
     def stop(self):
         if self.thread is not None:
             self._stop_event.set()
+            self._wake_event.set()
             self.thread.join()
             self.thread = None
             self._stop_event.clear()
+            self._wake_event.clear()
+
+
+class DataWriter:
+    """
+    Write data in a single thread after a delay, so a burst of changes is
+    written once. The file is replaced atomically through a temporary file.
+    """
+
+    def __init__(
+            self,
+            server: PluginServerInterface,
+            path: str,
+            get_content: Callable[[], str],
+            delay: float
+    ):
+        self.server = server
+        self.path = path
+        self.get_content = get_content
+        self.delay = delay
+        self.write_count = 0
+        self._condition = threading.Condition()
+        self._deadline: Optional[float] = None
+        self._stopped = False
+        self.thread = threading.Thread(
+            target=self._loop,
+            name='Gamemode-DataWriter',
+            daemon=True
+        )
+        self.thread.start()
+
+    def mark_dirty(self):
+        """
+        Write the data after the delay, or now if stopped.
+        """
+        with self._condition:
+            if self._stopped:
+                self._write()
+            elif self._deadline is None:
+                self._deadline = time.monotonic() + self.delay
+                self._condition.notify_all()
+
+    def stop(self):
+        """
+        Write pending changes and stop the thread.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self.thread.join()
+        with self._condition:
+            if self._deadline is not None:
+                self._write()
+
+    def _write(self):
+        self._deadline = None
+        try:
+            # retry if the data is changed while serializing
+            for _ in range(3):
+                try:
+                    content = self.get_content()
+                    break
+                except RuntimeError:
+                    time.sleep(0.01)
+            else:
+                raise RuntimeError('数据在序列化时被持续修改')
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            self.write_count += 1
+        except Exception:
+            self.server.logger.exception(f'保存数据文件 {self.path} 失败')
+
+    def _loop(self):
+        with self._condition:
+            while not self._stopped:
+                if self._deadline is None:
+                    self._condition.wait()
+                    continue
+                timeout = self._deadline - time.monotonic()
+                if timeout > 0:
+                    self._condition.wait(timeout)
+                    continue
+                self._write()
+
+
+class Position(NamedTuple):
+    x: float
+    y: float
+    z: float
+
+
+@dataclass(frozen=True)
+class PlayerSnapshot:
+    dim: str
+    pos: Position
+    rotation: List[float]
 
 
 class BaseConfig(Serializable):
@@ -95,6 +232,7 @@ class ConfigV2(BaseConfig):
     short_commands: List[str] = ['!s']
     permissions: Permissions = Permissions()
     range_limit: RangeLimit = RangeLimit()
+    worker_pool_size: int = 4
 
 
 LatestConfig = ConfigV2
@@ -133,6 +271,19 @@ HELP_MESSAGE = '''§6!!spec §7切换旁观/生存
 CONFIG_FILE_NAME = 'config.json'
 DATA_FILE_NAME = 'data.json'
 
+# blocks per second, faster than a spectator can fly, teleports to players
+# or entities are not covered and are caught within check_interval
+MAX_SPECTATOR_SPEED = 50
+
+# players at the border are checked every check_interval * this ratio
+BORDER_CHECK_RATIO = 0.25
+
+# seconds to wait for more changes before writing the data file
+DATA_SAVE_DELAY = 1.0
+
+# seconds to reuse a queried player snapshot
+SNAPSHOT_TTL = 0.5
+
 CONFIG_LATEST_VERSION = 2
 CONFIG_VERSION_MAP = {
     1: ConfigV1,
@@ -144,6 +295,12 @@ data: dict
 loop_manager: Optional[LoopManager] = None
 minecraft_data_api: Optional[Any] = None
 online_player_api: Optional[Any] = None
+executor: Optional[ThreadPoolExecutor] = None
+data_writer: Optional[DataWriter] = None
+# player -> monotonic time before which the player cannot leave the range
+range_check_times: Dict[str, float] = {}
+# player -> (monotonic time, snapshot)
+snapshot_cache: Dict[str, Tuple[float, 'PlayerSnapshot']] = {}
 
 
 def nether_to_overworld(x, z) -> tuple[int, int]:
@@ -191,6 +348,36 @@ def normalize_dimension(dim: str):
         raise ValueError(f'dimension {dim} not exist')
 
 
+def get_player_snapshot(player: str) -> PlayerSnapshot:
+    """
+    Get dimension, position and rotation of a player with one query.
+    The snapshot is reused for SNAPSHOT_TTL seconds.
+    """
+    now = time.monotonic()
+    cached = snapshot_cache.get(player)
+    if cached is not None and now - cached[0] < SNAPSHOT_TTL:
+        return cached[1]
+
+    info = minecraft_data_api.get_player_info(player)
+    if info is None:
+        raise ValueError(f'无法获取玩家 {player} 的信息')
+    snapshot = PlayerSnapshot(
+        dim=normalize_dimension(str(info['Dimension'])),
+        pos=Position(*info['Pos']),
+        rotation=info['Rotation']
+    )
+    snapshot_cache[player] = (now, snapshot)
+    return snapshot
+
+
+def teleported(player: str):
+    """
+    Forget cached states of a player teleported by the plugin.
+    """
+    snapshot_cache.pop(player, None)
+    range_check_times.pop(player, None)
+
+
 def load_config(server: PluginServerInterface) -> 'LatestConfig':
     """Load config file with migration."""
     # create a config file if none exists
@@ -235,6 +422,7 @@ def load_config(server: PluginServerInterface) -> 'LatestConfig':
 
 def on_load(server: PluginServerInterface, old):
     global config, data, loop_manager, minecraft_data_api, online_player_api
+    global executor, data_writer
     config = load_config(server)
     data = server.load_config_simple(
         DATA_FILE_NAME if config.data_path is None else config.data_path,
@@ -242,55 +430,105 @@ def on_load(server: PluginServerInterface, old):
         in_data_folder=(config.data_path is None),
         echo_in_console=False
     )['data']
+    data_writer = DataWriter(
+        server,
+        (
+            os.path.join(server.get_data_folder(), DATA_FILE_NAME)
+            if config.data_path is None else config.data_path
+        ),
+        lambda: json.dumps({'data': data}, indent=4, ensure_ascii=False),
+        DATA_SAVE_DELAY
+    )
     minecraft_data_api = server.get_plugin_instance('minecraft_data_api')
     online_player_api = server.get_plugin_instance('online_player_api')
 
+    executor = ThreadPoolExecutor(
+        max_workers=max(config.worker_pool_size, 1),
+        thread_name_prefix='Gamemode-Worker'
+    )
+
     server.register_help_message('!!spec help', 'Gamemode 插件帮助')
 
+    def run_in_executor(func: Callable) -> Callable:
+        # run blocking commands in the bounded executor
+        def run(*args, **kwargs):
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                server.logger.exception(f'执行 {func.__name__} 时出错')
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            executor.submit(run, *args, **kwargs)
+
+        return wrapper
+
     def check_player_pos():
         radius = [
             config.range_limit.x,
             config.range_limit.y,
             config.range_limit.z
         ]
+        min_interval = config.range_limit.check_interval * BORDER_CHECK_RATIO
+        now = time.monotonic()
+
+        # sleep until a player changes to spectator
+        if len(data) == 0:
+            range_check_times.clear()
+            return None
+
+        # players to check, skip who has tp permission, offline or could not
+        # reach the border since the last check
+        online_players = set(online_player_api.get_player_list())
+        candidates = [
+            player for player in list(data.keys())
+            if player in online_players and
+            server.get_permission_level(player) < config.permissions.tp
+        ]
+        players = [
+            player for player in candidates
+            if range_check_times.get(player, 0) <= now
+        ]
 
-        for player in data.keys():
-            # return if player has tp permission or offline
-            if server.get_permission_level(player) >= config.permissions.tp:
-                continue
-            elif not online_player_api.is_online(player):
-                continue
-
-            # get position
-            center = [x for x in data[player]['pos']]
-            pos = minecraft_data_api.get_player_info(player, 'Pos')
+        # get positions concurrently
+        positions = executor.map(
+            lambda p: minecraft_data_api.get_player_info(p, 'Pos'),
+            players
+        )
+        for player, pos in zip(players, positions):
             if pos is None:
                 server.logger.warning(
                     f'无法获取玩家 {player} 的位置，可能是玩家不在线'
                 )
+                range_check_times[player] = now + min_interval
+                continue
+            player_data = data.get(player)
+            if player_data is None:
                 continue
 
-            # verify position
-            valid_ranges = [
-                (center[i] - radius[i], center[i] + radius[i])
-                if radius[i] > 0
-                else None
-                for i in range(3)
-            ]
+            # verify position, and get distance to the border
+            center = player_data['pos']
             need_teleport = False
+            margin = float('inf')
             for i in range(3):
-                if valid_ranges[i] is None:
+                if radius[i] <= 0:
                     continue
-                if pos[i] < valid_ranges[i][0]:
+                low = center[i] - radius[i]
+                high = center[i] + radius[i]
+                if pos[i] < low:
                     need_teleport = True
-                    pos[i] = valid_ranges[i][0] + 0.5
-                elif pos[i] > valid_ranges[i][1]:
+                    pos[i] = low + 0.5
+                elif pos[i] > high:
                     need_teleport = True
-                    pos[i] = valid_ranges[i][1] - 0.5
+                    pos[i] = high - 0.5
+                else:
+                    margin = min(margin, pos[i] - low, high - pos[i])
 
             # teleport if out of range
             if need_teleport:
-                dimension = data[player]['dim']
+                snapshot_cache.pop(player, None)
+                range_check_times[player] = now + min_interval
+                dimension = player_data['dim']
                 server.execute(
                     f'execute in {dimension} run tp {player} '
                     f'{pos[0]} {pos[1]} {pos[2]}'
@@ -299,8 +537,31 @@ def on_load(server: PluginServerInterface, old):
                     player,
                     '§c您已超出活动范围，已被自动传送回活动范围内'
                 )
+            else:
+                # near the border more often, in the center at most every
+                # check_interval
+                range_check_times[player] = now + min(
+                    max(margin / MAX_SPECTATOR_SPEED, min_interval),
+                    config.range_limit.check_interval
+                )
+
+        # report duration
+        if len(players) > 0:
+            duration = (time.monotonic() - now) * 1000
+            server.logger.debug(
+                f'范围检查了 {len(players)} 名玩家，耗时 {duration:.1f}ms'
+            )
 
-    @new_thread('Gamemode switch mode')
+        # wait until the next player is due, or the max interval passed
+        due_times = [
+            range_check_times[player] for player in candidates
+            if player in range_check_times
+        ]
+        if len(due_times) == 0:
+            return config.range_limit.check_interval
+        return min(due_times) - time.monotonic()
+
+    @run_in_executor
     def change_mode(src: CommandSource, ctx: CommandContext):
         # assert src is a PlayerCommandSource
         if not isinstance(src, PlayerCommandSource):
@@ -326,7 +587,7 @@ def on_load(server: PluginServerInterface, old):
             server.tell(player, f'§a您使用了§e{use_time}min')
             spec_to_sur(server, player)
 
-    @new_thread('Gamemode tp')
+    @run_in_executor
     def tp(src: CommandSource, ctx: CommandContext):
         @dataclass
         class TeleportData:
@@ -371,12 +632,9 @@ def on_load(server: PluginServerInterface, old):
         )
 
         # get current position and dimension
-        current_pos = minecraft_data_api.get_player_coordinate(
-            src.player
-        )
-        current_dim = normalize_dimension(
-            str(minecraft_data_api.get_player_dimension(src.player))
-        )
+        snapshot = get_player_snapshot(src.player)
+        current_pos = snapshot.pos
+        current_dim = snapshot.dim
 
         # only dimension, or player name
         # e.g. !!tp the_end / !!tp Steve
@@ -496,6 +754,7 @@ def on_load(server: PluginServerInterface, old):
         save_data(server)
 
         # teleport the player
+        teleported(src.player)
         if tp_data.tp_type == 'to_player':
             server.execute(f'tp {src.player} {tp_data.player}')
             src.reply(f'§a已传送至玩家 §e{tp_data.player}')
@@ -514,7 +773,7 @@ def on_load(server: PluginServerInterface, old):
                 f'§a传送至§e{human_readable_dim}§a，坐标 §e{human_readable_pos}'
             )
 
-    @new_thread('Gamemode back')
+    @run_in_executor
     def back(src: CommandSource):
         # assert src is a PlayerCommandSource
         if not isinstance(src, PlayerCommandSource):
@@ -528,18 +787,16 @@ def on_load(server: PluginServerInterface, old):
         # back to previous position
         back_dim = data[src.player]['back']['dim']
         back_pos = [str(x) for x in data[src.player]['back']['pos']]
-        current_dim = normalize_dimension(
-            str(minecraft_data_api.get_player_dimension(src.player))
-        )
-        current_pos = minecraft_data_api.get_player_coordinate(src.player)
+        snapshot = get_player_snapshot(src.player)
         data[src.player]['back'] = {
-            'dim': current_dim,
-            'pos': current_pos,
+            'dim': snapshot.dim,
+            'pos': snapshot.pos,
         }
         save_data(server)
         server.execute(
             f'execute in {back_dim} run tp {src.player} {" ".join(back_pos)}'
         )
+        teleported(src.player)
         src.reply('§a已将您传送至上个地点')
 
     # enable range check
@@ -627,41 +884,43 @@ def on_load(server: PluginServerInterface, old):
 def on_player_joined(server: PluginServerInterface, player, info):
     if player in data.keys():
         server.execute(f'gamemode spectator {player}')
+        if loop_manager is not None:
+            loop_manager.wake()
 
 
 def on_unload(server: PluginServerInterface):
-    global loop_manager
+    global loop_manager, executor
     if loop_manager is not None:
         loop_manager.stop()
         loop_manager = None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+        executor = None
+    if data_writer is not None:
+        # kept, commands still running write through the stopped writer
+        data_writer.stop()
 
 
 def save_data(server: PluginServerInterface):
-    server.save_config_simple(
-        {'data': data},
-        DATA_FILE_NAME if config.data_path is None else config.data_path,
-        in_data_folder=(config.data_path is None)
-    )
+    data_writer.mark_dirty()
 
 
 def sur_to_spec(server, player):
-    dim = normalize_dimension(
-        str(minecraft_data_api.get_player_dimension(player))
-    )
-    pos = minecraft_data_api.get_player_coordinate(player)
-    rotation = minecraft_data_api.get_player_info(player, 'Rotation')
+    snapshot = get_player_snapshot(player)
     data[player] = {
-        'dim': dim,
-        'pos': pos,
-        'rotation': rotation,
+        'dim': snapshot.dim,
+        'pos': snapshot.pos,
+        'rotation': snapshot.rotation,
         'time': time.time(),
         'back': {
-            'dim': dim,
-            'pos': pos
+            'dim': snapshot.dim,
+            'pos': snapshot.pos
         }
     }
     server.execute(f'gamemode spectator {player}')
     save_data(server)
+    if loop_manager is not None:
+        loop_manager.wake()
 
 
 def spec_to_sur(server, player):
@@ -675,4 +934,5 @@ def spec_to_sur(server, player):
     )
     server.execute(f'gamemode survival {player}')
     del data[player]
+    teleported(player)
     save_data(server)
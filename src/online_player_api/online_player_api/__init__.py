@@ -1,27 +1,37 @@
-from typing import List
+from typing import Dict, List, Set
 
-online_players: List[str] = []
+# ordered by join time, values are unused
+online_players: Dict[str, None] = {}
+# lowercase name -> online player names, offline mode allows "Steve" and
+# "steve" online together
+lowercase_players: Dict[str, Set[str]] = {}
 
 
 def on_load(server, old):
-    global online_players
     if old is not None and hasattr(old, 'online_players'):
-        online_players = old.online_players
+        # older versions store a list, iterating works for both
+        for player in old.online_players:
+            on_player_joined(server, player, None)
 
 
 def on_server_stop(server, return_code):
-    global online_players
-    online_players = []
+    online_players.clear()
+    lowercase_players.clear()
 
 
 def on_player_joined(server, player, info):
     if player not in online_players:
-        online_players.append(player)
+        online_players[player] = None
+        lowercase_players.setdefault(player.lower(), set()).add(player)
 
 
 def on_player_left(server, player):
     if player in online_players:
-        online_players.remove(player)
+        del online_players[player]
+        players = lowercase_players[player.lower()]
+        players.discard(player)
+        if len(players) == 0:
+            del lowercase_players[player.lower()]
 
 
 def is_online(player: str, case_sensitive: bool = True) -> bool:
@@ -29,8 +39,7 @@ def is_online(player: str, case_sensitive: bool = True) -> bool:
     if case_sensitive:
         return player in online_players
     else:
-        player = player.lower()
-        return player in [i.lower() for i in online_players]
+        return player.lower() in lowercase_players
 
 
 def check_online(player: str, case_sensitive: bool = True) -> bool:
@@ -40,7 +49,7 @@ def check_online(player: str, case_sensitive: bool = True) -> bool:
 
 def get_player_list() -> List[str]:
     """Get all online players."""
-    return online_players.copy()
+    return list(online_players)
 
 
 def normalize_player_name(player: str) -> str:
@@ -51,7 +60,10 @@ def normalize_player_name(player: str) -> str:
     :return: The correctly cased player name.
     :raises ValueError: If the player is not online or the name is invalid.
     """
-    for p in online_players:
-        if p.lower() == player.lower():
-            return p
-    raise ValueError("Invalid player name")
+    players = lowercase_players.get(player.lower())
+    if not players:
+        raise ValueError("Invalid player name")
+    if len(players) == 1:
+        return next(iter(players))
+    # names differ only in case, the earliest joined one
+    return next(i for i in online_players if i in players)
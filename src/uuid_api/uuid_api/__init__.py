@@ -1,7 +1,15 @@
 import os
+import re
 import json
+import asyncio
+import time
+import threading
+import hashlib
+import functools
 import requests
 from uuid import UUID
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from mcdreforged.api.command import *
 from mcdreforged.api.rtext import RAction
@@ -10,6 +18,20 @@ from mcdreforged.api.utils import Serializable
 
 PROPERTIES_FILE_PATH = os.path.join('server', 'server.properties')
 USERCACHE_FILE_PATH = os.path.join('server', 'usercache.json')
+CACHE_FILE_NAME = 'cache.json'
+CACHE_FILE_VERSION = 1
+# seconds to collect more fetched uuids before writing the cache file
+CACHE_SAVE_DELAY = 10.0
+BULK_PROFILES_URL = (
+    'https://api.minecraftservices.com/minecraft/profile/lookup/bulk/byname'
+)
+BULK_PROFILES_LIMIT = 10
+MAX_CONCURRENT_REQUESTS = 4
+MAX_RETRIES = 5
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 10.0
+# names allowed by Mojang, others are rejected with 400
+VALID_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_]{1,16}$')
 
 
 class Config(Serializable):
@@ -17,15 +39,266 @@ class Config(Serializable):
     override_online_mode: bool = False
     override_online_mode_value: bool = True
     enable_commands: bool = False
+    cache_ttl: int = 604800
+    negative_cache_ttl: int = 3600
+    cache_max_size: int = 10000
+    usercache_check_interval: float = 5.0
+    request_timeout: float = 5.0
+    verify_offline_uuid: bool = False
+
+
+class UUIDLookupError(Exception):
+    """
+    Raised when the UUID could not be fetched, such as a network error.
+    A player not found is not an error.
+    """
+    pass
+
+
+class UUIDCache:
+    """
+    Cache of fetched UUIDs with expiry time, None means not found.
+    Least recently used entries are evicted when the cache is full.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        # name -> (uuid or None, expiry timestamp), least recent first
+        self._entries: OrderedDict[str, tuple[UUID | None, float]] = (
+            OrderedDict()
+        )
+        # uuid -> name, reverse index of found entries
+        self._names: dict[UUID, str] = {}
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, name: str) -> tuple[bool, UUID | None]:
+        """
+        Get a cached UUID.
+        :param name: Player name.
+        :return: A tuple of whether the name is cached, and the UUID.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return False, None
+            if entry[1] <= time.time():
+                self._remove(name)
+                return False, None
+            self._entries.move_to_end(name)
+            return True, entry[0]
+
+    def get_name(self, uuid: UUID) -> str | None:
+        """
+        Get the cached name of a UUID.
+        :param uuid: UUID.
+        :return: Player name, None if not cached.
+        """
+        with self._lock:
+            name = self._names.get(uuid)
+            if name is None:
+                return None
+            if self._entries[name][1] <= time.time():
+                self._remove(name)
+                return None
+            return name
+
+    def put(self, name: str, uuid: UUID | None, ttl: float):
+        """
+        Cache a UUID.
+        :param name: Player name.
+        :param uuid: UUID, or None if the player is not found.
+        :param ttl: Seconds to keep the entry.
+        """
+        with self._lock:
+            self._set(name, uuid, time.time() + ttl)
+            self._evict()
+
+    def load(self, path: str, mode: bool):
+        """
+        Load entries from the file, expired entries are skipped.
+        :param path: File path.
+        :param mode: Online mode, entries of the other mode are dropped.
+        """
+        if not os.path.isfile(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if (
+                data.get('version') != CACHE_FILE_VERSION or
+                data.get('onlineMode') != mode
+        ):
+            return
+
+        now = time.time()
+        with self._lock:
+            for name, entry in data.get('entries', {}).items():
+                if entry['expires'] <= now:
+                    continue
+                uuid = entry['uuid']
+                self._set(
+                    name,
+                    UUID(uuid) if uuid is not None else None,
+                    entry['expires']
+                )
+            self._evict()
+            self._dirty = False
+
+    def save(self, path: str, mode: bool):
+        """
+        Write entries to the file atomically if changed.
+        :param path: File path.
+        :param mode: Online mode.
+        """
+        # one writer at a time, so an older snapshot never wins
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = {
+                    'version': CACHE_FILE_VERSION,
+                    'onlineMode': mode,
+                    'entries': {
+                        name: {
+                            'uuid': str(uuid) if uuid is not None else None,
+                            'expires': expires
+                        }
+                        for name, (uuid, expires) in self._entries.items()
+                    }
+                }
+                self._dirty = False
+
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, path)
+
+    def _set(self, name: str, uuid: UUID | None, expires: float):
+        if name in self._entries:
+            self._remove(name)
+        self._entries[name] = (uuid, expires)
+        if uuid is not None:
+            self._names[uuid] = name
+        self._dirty = True
+
+    def _remove(self, name: str):
+        uuid, _ = self._entries.pop(name)
+        if uuid is not None and self._names.get(uuid) == name:
+            del self._names[uuid]
+        self._dirty = True
+
+    def _evict(self):
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+
+class UsercacheWatcher:
+    """
+    Read usercache.json again when its modified time or size changes.
+    """
+
+    def __init__(self, server: PluginServerInterface, interval: float):
+        self.server = server
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=self._loop,
+            name='UUIDAPI-UsercacheWatcher',
+            daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self.thread.join()
+
+    def _loop(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                read_usercache()
+            except (OSError, ValueError):
+                self.server.logger.exception('Failed to read usercache.json')
+
+
+class CacheSaver:
+    """
+    Write the cache file once after a delay, instead of after every fetch.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._condition = threading.Condition()
+        self._deadline: float | None = None
+        self._stopped = False
+        self.thread = threading.Thread(
+            target=self._loop,
+            name='UUIDAPI-CacheSaver',
+            daemon=True
+        )
+        self.thread.start()
+
+    def mark_dirty(self):
+        with self._condition:
+            if self._deadline is None:
+                self._deadline = time.monotonic() + self.delay
+                self._condition.notify_all()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self.thread.join()
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if self._deadline is None:
+                        self._condition.wait()
+                        continue
+                    timeout = self._deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self._condition.wait(timeout)
+                if self._stopped:
+                    return
+                self._deadline = None
+            save_cache()
 
 
 config: Config
 online_mode: bool = True
 uuid_cache: dict[str, UUID] = {}
+# uuid -> name, reverse index of uuid_cache
+name_cache: dict[UUID, str] = {}
+usercache_lock = threading.Lock()
+# (mtime, size) of the last read usercache.json
+usercache_stat: tuple[float, int] | None = None
+usercache_watcher: 'UsercacheWatcher | None' = None
+cache_saver: CacheSaver | None = None
+fetched_cache: UUIDCache = UUIDCache(Config.cache_max_size)
+cache_file_path: str = ''
+session = requests.Session()
+session.mount('https://', requests.adapters.HTTPAdapter(
+    pool_connections=MAX_CONCURRENT_REQUESTS,
+    pool_maxsize=MAX_CONCURRENT_REQUESTS
+))
+executor = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_REQUESTS,
+    thread_name_prefix='UUIDAPI-Worker'
+)
+# name -> future of the fetch in progress
+in_flight: dict[str, Future] = {}
+in_flight_lock = threading.Lock()
 
 
 def on_load(server: PluginServerInterface, old):
-    global config, online_mode
+    global config, online_mode, cache_file_path
+    global usercache_watcher, cache_saver
 
     # load config
     config = server.load_config_simple(
@@ -55,6 +328,21 @@ def on_load(server: PluginServerInterface, old):
     # load uuids from usercache.json if enabled
     if config.use_usercache:
         read_usercache()
+        if config.usercache_check_interval > 0:
+            usercache_watcher = UsercacheWatcher(
+                server,
+                config.usercache_check_interval
+            )
+
+    # load fetched uuids
+    fetched_cache.max_size = config.cache_max_size
+    cache_file_path = os.path.join(server.get_data_folder(), CACHE_FILE_NAME)
+    try:
+        fetched_cache.load(cache_file_path, online_mode)
+    except (OSError, ValueError, KeyError, TypeError):
+        server.logger.exception('Failed to load UUID cache, ignored')
+    server.logger.debug(f'Loaded {len(fetched_cache)} cached UUIDs')
+    cache_saver = CacheSaver(CACHE_SAVE_DELAY)
 
     # register commands
     if config.enable_commands:
@@ -67,6 +355,45 @@ def on_load(server: PluginServerInterface, old):
         register_commands(server)
 
 
+def on_unload(server: PluginServerInterface):
+    global cache_saver
+    if usercache_watcher is not None:
+        usercache_watcher.stop()
+    executor.shutdown(wait=False, cancel_futures=True)
+    session.close()
+
+    # fetches still running save directly
+    if cache_saver is not None:
+        cache_saver.stop()
+        cache_saver = None
+    save_cache()
+
+
+def save_cache():
+    """
+    Write fetched UUIDs to the cache file if changed.
+    """
+    if cache_file_path == '':
+        return
+    try:
+        fetched_cache.save(cache_file_path, online_mode)
+    except OSError:
+        PluginServerInterface.get_instance().logger.exception(
+            'Failed to save UUID cache'
+        )
+
+
+def mark_cache_dirty():
+    """
+    Save the cache file later, or now if unloaded.
+    """
+    saver = cache_saver
+    if saver is not None:
+        saver.mark_dirty()
+    else:
+        save_cache()
+
+
 def get_online_mode() -> bool | None:
     """
     Get the online mode setting from server.properties.
@@ -93,71 +420,334 @@ def get_online_mode() -> bool | None:
 
 def read_usercache():
     """
-    Reads the usercache.json and loads it into the cache.
+    Reads the usercache.json if changed since the last read, and merges it
+    into the cache.
     """
-    global uuid_cache
+    global usercache_stat
 
     # check if usercache.json exists
     if not os.path.isfile(USERCACHE_FILE_PATH):
         return
 
-    # read usercache.json
-    uuid_cache = {}
-    with open(USERCACHE_FILE_PATH, 'r', encoding='utf-8') as f:
-        usercache = json.load(f)
+    with usercache_lock:
+        # skip if not changed
+        stat = os.stat(USERCACHE_FILE_PATH)
+        if (stat.st_mtime, stat.st_size) == usercache_stat:
+            return
+
+        # read usercache.json
+        with open(USERCACHE_FILE_PATH, 'r', encoding='utf-8') as f:
+            usercache = json.load(f)
         for cache in usercache:
             if 'name' in cache and 'uuid' in cache:
-                uuid_cache[cache['name']] = UUID(cache['uuid'])
+                name = cache['name']
+                uuid = UUID(cache['uuid'])
+
+                # the player changed name
+                old_name = name_cache.get(uuid)
+                if old_name is not None and old_name != name:
+                    uuid_cache.pop(old_name, None)
+
+                uuid_cache[name] = uuid
+                name_cache[uuid] = name
+        usercache_stat = (stat.st_mtime, stat.st_size)
 
 
 def online_uuid(name) -> UUID | None:
+    """
+    :raises UUIDLookupError: If failed to fetch.
+    """
     url = f'https://api.mojang.com/users/profiles/minecraft/{name}'
     r = get_try(url)
     if r is None:
-        return None
+        raise UUIDLookupError(name)
     else:
         uuid = r.get('id', None)
         return UUID(uuid) if uuid is not None else None
 
 
-def offline_uuid(name) -> UUID | None:
+def offline_uuid(name) -> UUID:
+    """
+    Compute the offline UUID locally, and compare it with the web service
+    in the background if verify_offline_uuid is enabled.
+    """
+    uuid = compute_offline_uuid(name)
+    if config.verify_offline_uuid:
+        try:
+            executor.submit(check_offline_uuid, name, uuid)
+        except RuntimeError:
+            # unloaded, the result does not depend on it
+            pass
+    return uuid
+
+
+def check_offline_uuid(name: str, uuid: UUID):
+    """
+    Log a warning if the computed offline UUID mismatches the web service.
+    """
+    logger = PluginServerInterface.get_instance().logger
+    try:
+        fetched = fetch_offline_uuid(name)
+    except UUIDLookupError:
+        logger.warning(f'Failed to verify offline UUID of {name}')
+    else:
+        if fetched != uuid:
+            logger.warning(
+                f'Offline UUID of {name} mismatch: '
+                f'computed {uuid}, fetched {fetched}'
+            )
+
+
+def fetch_offline_uuid(name) -> UUID | None:
+    """
+    Fetch the offline UUID from a web service, only used to verify.
+    :raises UUIDLookupError: If failed to fetch.
+    """
     url = f'http://tools.glowingmines.eu/convertor/nick/{name}'
     r = get_try(url)
     if r is None:
-        return None
+        raise UUIDLookupError(name)
     else:
         uuid = r.get('offlineuuid', None)
         return UUID(uuid) if uuid is not None else None
 
 
+@functools.lru_cache(maxsize=4096)
+def compute_offline_uuid(name: str) -> UUID:
+    """
+    Compute the UUID of a player on an offline mode server.
+    """
+    digest = hashlib.md5(f'OfflinePlayer:{name}'.encode('utf-8')).digest()
+    return UUID(bytes=digest, version=3)
+
+
+def bulk_online_uuids(names: list[str]) -> dict[str, UUID | None]:
+    """
+    Fetch UUIDs of at most BULK_PROFILES_LIMIT names in one request.
+    :return: Dict of the given names to UUIDs, None if not found. Names
+        failed to fetch are left out.
+    :raises UUIDLookupError: If failed to fetch.
+    """
+    # invalid names never exist, and would fail the whole chunk
+    result: dict[str, UUID | None] = {
+        name: None for name in names if not VALID_NAME_PATTERN.match(name)
+    }
+    names = [name for name in names if name not in result]
+    if len(names) == 0:
+        return result
+
+    for i in range(0, MAX_RETRIES):
+        try:
+            response = session.post(
+                BULK_PROFILES_URL,
+                json=names,
+                timeout=config.request_timeout
+            )
+        except requests.RequestException:
+            continue
+        if response.status_code == 400:
+            # a name rejected by the api, look up one by one instead
+            for name in names:
+                try:
+                    result[name] = online_uuid(name)
+                except UUIDLookupError:
+                    pass
+            return result
+        if response.status_code == 429:
+            time.sleep(retry_delay(response, i))
+            continue
+        if 400 <= response.status_code < 500:
+            break
+        try:
+            response.raise_for_status()
+            profiles = response.json()
+        except requests.RequestException:
+            continue
+
+        # names are case-insensitive
+        found = {
+            profile['name'].lower(): UUID(profile['id'])
+            for profile in profiles
+        }
+        result.update({name: found.get(name.lower()) for name in names})
+        return result
+    raise UUIDLookupError(', '.join(names))
+
+
+def retry_delay(response: requests.Response, attempt: int) -> float:
+    """
+    Seconds to wait before retrying a rate limited request.
+    """
+    try:
+        delay = float(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        delay = RETRY_DELAY * 2 ** attempt
+    return min(delay, MAX_RETRY_DELAY)
+
+
 def get_try(url) -> dict | None:
-    for i in range(0, 5):
+    """
+    :return: Response json, an empty dict if not found, None if failed.
+    """
+    for i in range(0, MAX_RETRIES):
         try:
-            return requests.get(url).json()
+            response = session.get(url, timeout=config.request_timeout)
+            if response.status_code in (204, 404):
+                return {}
+            if response.status_code == 429:
+                time.sleep(retry_delay(response, i))
+                continue
+            if 400 <= response.status_code < 500:
+                return None
+            # errors such as 5xx also have json bodies
+            response.raise_for_status()
+            return response.json()
         except requests.RequestException:
             pass
     return None
 
 
 def get_uuid(name: str) -> UUID | None:
+    return get_uuid_future(name).result()
+
+
+async def get_uuid_async(name: str) -> UUID | None:
+    """
+    Get the UUID of a player without blocking the event loop.
+    """
+    return await asyncio.wrap_future(get_uuid_future(name))
+
+
+def get_uuid_future(name: str) -> Future:
+    """
+    Get the UUID of a player as a future.
+    Concurrent requests of the same name share one fetch, and at most
+    MAX_CONCURRENT_REQUESTS fetches run at the same time.
+    :return: A Future of the UUID, None if not found or failed to fetch.
+    """
     # return cached uuid if exists
     if name in uuid_cache:
-        return uuid_cache[name]
+        return completed_future(uuid_cache[name])
+
+    # offline uuids never need the network
+    if not online_mode:
+        return completed_future(offline_uuid(name))
+
+    cached, uuid = fetched_cache.get(name)
+    if cached:
+        return completed_future(uuid)
 
-    # fetch uuid if not cached
-    if online_mode:
+    # join the fetch in progress, or start a new one
+    with in_flight_lock:
+        future = in_flight.get(name)
+        if future is not None:
+            return future
+        future = executor.submit(fetch_uuid, name)
+        in_flight[name] = future
+
+    def done(f: Future):
+        with in_flight_lock:
+            if in_flight.get(name) is f:
+                del in_flight[name]
+
+    future.add_done_callback(done)
+    return future
+
+
+def completed_future(result) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def fetch_uuid(name: str) -> UUID | None:
+    """
+    Fetch the online UUID of a player and cache it.
+    :return: UUID, None if not found or failed to fetch.
+    """
+    try:
         uuid = online_uuid(name)
-    else:
-        uuid = offline_uuid(name)
+    except UUIDLookupError:
+        return None
 
-    # add to cache
+    # add to cache, not found names are kept shorter
     if uuid is not None:
-        uuid_cache[name] = uuid
+        fetched_cache.put(name, uuid, config.cache_ttl)
+    else:
+        fetched_cache.put(name, None, config.negative_cache_ttl)
+    mark_cache_dirty()
 
     # return the uuid
     return uuid
 
 
+def get_name(uuid: UUID | str) -> str | None:
+    """
+    Get the name of a player from usercache.json and fetched UUIDs.
+    :param uuid: UUID or UUID string.
+    :return: Player name, None if not known.
+    """
+    if isinstance(uuid, str):
+        uuid = UUID(uuid)
+    name = name_cache.get(uuid)
+    if name is not None:
+        return name
+    return fetched_cache.get_name(uuid)
+
+
+def get_uuids(names: list[str]) -> dict[str, UUID | None]:
+    """
+    Get UUIDs of many players.
+    Cached names are served from the cache, others are fetched in chunks
+    concurrently in online mode, or computed in offline mode.
+    :param names: Player names, duplicates are ignored.
+    :return: Dict of names to UUIDs, None if not found or failed to fetch.
+    """
+    result: dict[str, UUID | None] = {}
+    misses: list[str] = []
+    for name in dict.fromkeys(names):
+        if name in uuid_cache:
+            result[name] = uuid_cache[name]
+            continue
+        cached, uuid = fetched_cache.get(name)
+        if cached:
+            result[name] = uuid
+        else:
+            misses.append(name)
+
+    # offline uuids never need the network
+    if not online_mode:
+        for name in misses:
+            result[name] = offline_uuid(name)
+        return result
+
+    # fetch in chunks concurrently
+    chunks = [
+        misses[i:i + BULK_PROFILES_LIMIT]
+        for i in range(0, len(misses), BULK_PROFILES_LIMIT)
+    ]
+    futures = [executor.submit(bulk_online_uuids, i) for i in chunks]
+    for chunk, future in zip(chunks, futures):
+        try:
+            uuids = future.result()
+        except UUIDLookupError:
+            result.update(dict.fromkeys(chunk))
+            continue
+        for name in chunk:
+            if name not in uuids:
+                result[name] = None
+                continue
+            uuid = uuids[name]
+            result[name] = uuid
+            if uuid is not None:
+                fetched_cache.put(name, uuid, config.cache_ttl)
+            else:
+                fetched_cache.put(name, None, config.negative_cache_ttl)
+    if len(misses) > 0:
+        mark_cache_dirty()
+    return result
+
+
 # -------------------------
 # Commands
 # -------------------------